@@ -0,0 +1,235 @@
+"""Benchmarks."""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import generator
+from board import Board, DATA_FILE_NAME
+from database import NEIGHBORS_COORD
+from tile import Tile
+
+SUITE_SIZES = [1000, 10000, 100000]
+SUITE_QUERIES = 50
+
+
+def spiral(nb_tiles: int) -> Iterator[Tuple[int, int]]:
+    """Generate coordinates ring by ring around the origin, each one being a valid slot once the previous are placed.
+
+    :param nb_tiles: number of coordinates to generate.
+    """
+    yield 0, 0
+    count, radius = 1, 1
+    while True:
+        x, y = NEIGHBORS_COORD[4]["x"] * radius, NEIGHBORS_COORD[4]["y"] * radius
+        for i in range(6):
+            for _ in range(radius):
+                if count == nb_tiles:
+                    return
+                yield x, y
+                count += 1
+                x, y = x + NEIGHBORS_COORD[i]["x"], y + NEIGHBORS_COORD[i]["y"]
+        radius += 1
+
+
+def write_board(path: str, nb_tiles: int, seed: int = 0) -> None:
+    """Write a data file of random tiles laid out in a spiral.
+
+    :param path: data file to create.
+    :param nb_tiles: number of tiles.
+    :param seed: random seed.
+    """
+    rnd = random.Random(seed)
+    with open(path, 'w') as file:
+        for x, y in spiral(nb_tiles):
+            file.write(";".join(str(n) for n in [x, y] + [rnd.randint(1, 8) for _ in range(6)]) + "\n")
+
+
+def bench_load(sizes: List[int]) -> None:
+    """Time Board loading for each board size."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for nb_tiles in sizes:
+            path = os.path.join(tmp_dir, f"{nb_tiles}.csv")
+            write_board(path, nb_tiles)
+            # The first load replays the data file and writes the snapshot, the second one loads the snapshot
+            for source in ["csv", "snapshot"]:
+                t0 = time.perf_counter()
+                Board(lambda _: None, data_file=path)
+                t1 = time.perf_counter()
+                print(f"load {source:<8} | {nb_tiles:>7} tiles | {(t1 - t0):8.2f}s"
+                      f" | {(t1 - t0) / nb_tiles * 1e6:6.1f}us/tile")
+
+
+def bench_memory(path: str) -> None:
+    """Measure the memory held by a Board loaded from a data file."""
+    tracemalloc.start()
+    board = Board(lambda _: None, data_file=path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nb_tiles = board.get_size()
+    print(f"memory | {nb_tiles:>7} tiles and slots | {current / 2 ** 20:8.2f}MiB | {current / nb_tiles:6.0f}B/tile"
+          f" | peak {peak / 2 ** 20:.2f}MiB")
+
+
+def bench_render(path: str) -> None:
+    """Time the fast and the full renders of a Board loaded from a data file, then again after one placement.
+
+    Images are written in a temporary folder.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_file = os.path.join(tmp_dir, os.path.basename(path))
+        shutil.copy(path, data_file)
+        board = Board(lambda _: None, data_file=data_file)
+        for fast_mode in [True, False]:
+            t0 = time.perf_counter()
+            board.render(fast_mode=fast_mode)
+            t1 = time.perf_counter()
+            print(f"render {'fast' if fast_mode else 'full':<6} | {(t1 - t0):8.2f}s")
+
+        # Render again after a single placement, only the chunks around it are drawn
+        matches, _ = board.help_me([Tile.Edge.PLAIN] * 6)
+        if matches:
+            board.place_tile(Tile(*matches[0].tile.get_pos(), edges=[Tile.Edge.PLAIN] * 6), show=False)
+            for fast_mode in [True, False]:
+                t0 = time.perf_counter()
+                board.render(fast_mode=fast_mode)
+                t1 = time.perf_counter()
+                print(f"render {'fast' if fast_mode else 'full':<6} | {(t1 - t0):8.2f}s after one placement")
+
+
+def bench_candidates(path: str, nb_tiles: int = 200, seed: int = 0) -> None:
+    """Time a game session: help for tiles drawn from a data file, each one placed at its first match.
+
+    Closed slots and 5/6 matches call find_candidate, its cache statistics are reported.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_file = os.path.join(tmp_dir, os.path.basename(path))
+        shutil.copy(path, data_file)
+        board = Board(lambda _: None, data_file=data_file)
+        with open(data_file) as file:
+            tiles = [[Tile.Edge(int(n)) for n in line.split(';')[2:]] for line in file]
+        rnd = random.Random(seed)
+        t0 = time.perf_counter()
+        for edges in rnd.choices(tiles, k=nb_tiles):
+            matches, _ = board.help_me(edges)
+            if matches:
+                board.place_tile(min(matches, key=lambda match: match.tile.get_pos()).tile)
+        t1 = time.perf_counter()
+        info = board.get_cache_info()
+        print(f"candidates | {nb_tiles:>5} tiles | {(t1 - t0):8.2f}s | cache hits {info.hits} misses {info.misses}"
+              f" invalidations {info.invalidations}")
+
+
+def _timings(function: Callable, args: List) -> Dict[str, float]:
+    """Call a function with each argument, and sum up the time taken in milliseconds."""
+    times = []
+    for arg in args:
+        t0 = time.perf_counter()
+        function(arg)
+        times.append(1000 * (time.perf_counter() - t0))
+    return _summary(times)
+
+
+def _summary(times: List[float]) -> Dict[str, float]:
+    """Number of calls, mean, median, 95th percentile and maximum of times in milliseconds."""
+    times = sorted(times)
+    return {
+        "calls": len(times),
+        "mean_ms": round(sum(times) / len(times), 3),
+        "p50_ms": round(times[len(times) // 2], 3),
+        "p95_ms": round(times[min(len(times) - 1, len(times) * 95 // 100)], 3),
+        "max_ms": round(times[-1], 3),
+    }
+
+
+def _commit() -> str:
+    """Commit of the sources benchmarked, empty if unknown."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def bench_suite(sizes: List[int], output: str, nb_queries: int = SUITE_QUERIES, seed: int = 0) -> None:
+    """Time each Board operation on generated boards of each size, and write the results as JSON.
+
+    The tiles queried and placed are drawn from the tiles of the board. Placements are undone after being timed.
+
+    :param sizes: board sizes.
+    :param output: JSON file written.
+    :param nb_queries: number of tiles queried by operation.
+    :param seed: seed of the boards and of the queries.
+    """
+    results = {"commit": _commit(), "python": platform.python_version(), "seed": seed, "queries": nb_queries,
+               "sizes": {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for nb_tiles in sizes:
+            tiles = generator.generate(nb_tiles, seed)
+            path = os.path.join(tmp_dir, f"{nb_tiles}.csv")
+            generator.write_data_file(path, tiles)
+            queries = [tile.get_edges() for tile in random.Random(seed).choices(tiles, k=nb_queries)]
+            result: Dict[str, Dict[str, float]] = {}
+
+            boards = []
+            result["load_csv"] = _timings(lambda _: boards.append(Board(lambda _: None, data_file=path)), [None])
+            result["load_snapshot"] = _timings(lambda _: boards.append(Board(lambda _: None, data_file=path)), [None])
+            board = boards[-1]
+            result["help_me"] = _timings(board.help_me, queries)
+            result["help_batch"] = _timings(board.help_batch, [queries])  # all the queries in one call
+            result["find_candidate"] = _timings(board.find_candidate, queries)
+            result["find_tile"] = _timings(board.find_tile, queries)
+
+            # Each tile placed on its first placement with no conflict, if any
+            times = []
+            for edges in queries:
+                placements = board.get_placements(edges)
+                if placements:
+                    tile = min(placements, key=lambda placement: placement[0].get_pos())[0]
+                    t0 = time.perf_counter()
+                    board.place_tile(tile, show=False)
+                    times.append(1000 * (time.perf_counter() - t0))
+            result["place_tile"] = _summary(times)
+            result["undo"] = _timings(lambda _: board.undo(show=False), times)
+            result["render_fast"] = _timings(lambda _: board.render(fast_mode=True), [None])
+            result["render_full"] = _timings(lambda _: board.render(fast_mode=False), [None])
+            results["sizes"][nb_tiles] = result
+            print(f"suite | {nb_tiles:>7} tiles | " + " | ".join(f"{name} {timing['mean_ms']:.2f}ms"
+                                                              for name, timing in result.items()))
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"suite | results written in {output}")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Dorfro-solver benchmarks")
+    parser.add_argument("benchmarks", nargs="*", choices=["load", "memory", "render", "candidates", "suite"],
+                        default=["load", "memory", "render", "candidates"])
+    parser.add_argument("--sizes", type=int, nargs="+", help="board sizes, 3500 35000 350000 by default for the load"
+                        f" benchmark, {' '.join(str(size) for size in SUITE_SIZES)} for the suite")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file written by the suite")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), DATA_FILE_NAME),
+                        help="data file for the memory, render and candidates benchmarks")
+    args = parser.parse_args()
+    if "load" in args.benchmarks:
+        bench_load(args.sizes or [3500, 35000, 350000])
+    if "memory" in args.benchmarks:
+        bench_memory(args.data)
+    if "render" in args.benchmarks:
+        bench_render(args.data)
+    if "candidates" in args.benchmarks:
+        bench_candidates(args.data)
+    if "suite" in args.benchmarks:
+        bench_suite(args.sizes or SUITE_SIZES, args.output)
+
+
+if __name__ == '__main__':
+    main()
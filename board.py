@@ -3,16 +3,32 @@ import math as m
 import os
 import sys
 import time
-from typing import List, Optional, NamedTuple, Dict, Callable
+from contextlib import contextmanager
+from typing import List, Optional, NamedTuple, Dict, Callable, Iterator, Tuple, TYPE_CHECKING
 
-import matplotlib.pyplot as plt
-from mpl_toolkits.axisartist import Axes
-from mpl_toolkits.axisartist.grid_finder import MaxNLocator
-from mpl_toolkits.axisartist.grid_helper_curvelinear import GridHelperCurveLinear
+import numpy as np
 
+from closure import ClosureModel
 from database import Database, Tile, NEIGHBORS_COORD
+from features import FeatureGroups, Group
+from frontier import Frontier
+import grid
+from journal import Journal, PLACEMENT, UNDO
+import planner
+from profiler import Profiler
+from ranking import Ranking, TOP_MATCHES
+from scoring import ScoringEngine
+from signature_index import CacheInfo, SignatureIndex
+import snapshot
+
+if TYPE_CHECKING:
+    from renderer import ChunkRenderer  # imports matplotlib, only needed to render
 
 DATA_FILE_NAME = 'DATA.csv'
+JOURNAL_COMPACT_SIZE = 1000  # journal entries before compacting them into the data file
+PROFILE_FILE_NAME = 'profile.json'
+LOAD_PROGRESS_PERCENT = 10  # share of the tiles loaded between two progress logs
+PROFILED = ("help_me", "help_batch", "find_candidate", "find_tile", "place_tile", "undo", "redo", "save_data", "render")
 
 COLOR_MAPPING: Dict[Tile.Edge, str] = {
     Tile.Edge.EMPTY: 'white',
@@ -38,95 +54,214 @@ EDGE_VALUE: Dict[Tile.Edge, int] = {
 }
 
 
+class _Placement(NamedTuple):
+    """What a placement changed, to revert it: the slot filled and the empty slots created around it."""
+    tile: Tile
+    new_slots: List[Tile]
+
+
+class Match(NamedTuple):
+    """Placement of a tile with no conflict, see Board.help_me."""
+    tile: Tile
+    n_neighbors: int
+    value: float
+    distance: float
+    closure: float
+    merges: int
+    closures: int
+    group: int
+
+
+class FiveOfSixMatch(NamedTuple):
+    """Placement of a tile on a closed slot, matching all but one compatible edge, see Board.help_me."""
+    tile: Tile
+    ideal_occurrence: int
+    closure: float
+
+
 class Board:
     """Factory ensuring the database coherence given the Dorfromantik rules."""
 
-    def __init__(self, logger: Callable):
+    def __init__(self, logger: Callable, data_file: Optional[str] = None, data: Optional[snapshot.Snapshot] = None,
+                 profile: bool = False):
+        """
+        :param logger: logs function.
+        :param data_file: data file of the placements, DATA.csv next to the script by default.
+        :param data: tiles and slots to start from instead, for a board held in memory only (no journal, no save).
+        :param profile: time the operations from the loading on, see set_profiling.
+        """
         self._logger = logger
+        self._data_file = data_file or os.path.join(os.path.dirname(sys.argv[0]), DATA_FILE_NAME)
         self._database: Database = Database()
-        nb_tiles, avg_x, avg_y = 0, 0, 0
+        self._frontier: Frontier = Frontier()
+        self._grid: grid.Grid = grid.Grid()  # dense copy of the database, for the whole board queries
+        self._grid.set(0, 0, grid.SLOT)
+        self._signatures: SignatureIndex = SignatureIndex(EDGE_MATCH)
+        self._closure: ClosureModel = ClosureModel(EDGE_MATCH)
+        self._features: FeatureGroups = FeatureGroups()
+        self._scoring: ScoringEngine = ScoringEngine(
+            EDGE_MATCH, EDGE_COMPATIBLE, EDGE_PAIR_VALUE, [EDGE_VALUE.get(e, 0) for e in Tile.Edge]
+        )
+        self._journal: Optional[Journal] = None
+        self._renderer: Optional['ChunkRenderer'] = None
+        self._history: List[_Placement] = []  # placements that can be undone, since the last compaction
+        self._history_floor = 0  # placements of the history made before the current transaction
+        self._redo: List[Tile] = []  # placements undone, the next one to redo last
+        self._profiler = Profiler()
+        if profile:
+            self.set_profiling(True)
+        t0 = time.perf_counter()
+        if data is not None:
+            self._load(data)
+        else:
+            self._load_data_file()
+        load_time = time.perf_counter() - t0
+        if self._profiler.enabled:
+            self._profiler.record("load", load_time)
+
+        nb_tiles = len(self._grid.get_positions(grid.FULL))
+        if data is None:
+            self._logger(f"Database loaded: {nb_tiles} tiles found in {load_time:.2f}s.")
+        center = self._grid.get_center()
+        self.m_x, self.m_y = center if center is not None else (0.0, 0.0)
+
+    def _load_data_file(self) -> None:
+        """Load the board from the snapshot or the data file, then replay the journal."""
         self._logger("Loading Database...")
-        with open(os.path.join(os.path.dirname(sys.argv[0]), DATA_FILE_NAME)) as file:
-            for line in file:
+        t0 = time.perf_counter()
+        if self._load_snapshot():
+            self._logger(f"Warm start: snapshot read in {(time.perf_counter() - t0):.2f}s.")
+        else:
+            self._frontier.add(self._database.get_tile(0, 0))
+            with open(self._data_file) as file:
+                lines = file.readlines()
+            for i, line in enumerate(lines, 1):
                 x, y, e0, e1, e2, e3, e4, e5 = [int(n) for n in line.split(';')]
-                tile = self.place_tile(Tile(x, y, edges=[e0, e1, e2, e3, e4, e5]), show=False)
-                if tile.state == tile.State.FULL:
-                    avg_x += x
-                    avg_y += y
-                    nb_tiles += 1
-        self._logger(f"Database loaded: {nb_tiles} tiles found.")
-        self.m_x, self.m_y = avg_x / nb_tiles, avg_y / nb_tiles
-        self.last_placement: Optional[Tile] = None
+                self.place_tile(Tile(x, y, edges=[e0, e1, e2, e3, e4, e5]), show=False)
+                self._log_progress(i, len(lines))
+            self._history.clear()
+            self._features.commit()
+            self._save_snapshot()
+            self._logger(f"Cold start: data file replayed in {(time.perf_counter() - t0):.2f}s, no valid snapshot.")
+
+        # Replay what was placed since the data file was last written
+        journal = Journal(self._data_file)
+        nb_entries = 0
+        for kind, values in journal.read():
+            if kind == PLACEMENT:
+                self.place_tile(Tile(values[0], values[1], edges=values[2:]), show=False)
+            elif kind == UNDO:
+                self.undo(show=False)
+            nb_entries += 1
+        if nb_entries:
+            self._logger(f"Journal replayed: {nb_entries} entries.")
+        backup = journal.open()
+        if backup:
+            self._logger(f"Journal written for another version of {os.path.basename(self._data_file)}, not replayed: "
+                         f"moved to {os.path.basename(backup)}")
+        self._journal = journal
+
+    def _load_snapshot(self) -> bool:
+        """Load the tiles and the frontier from the binary snapshot, without replaying the placements.
+
+        :return: False if the snapshot is missing or stale.
+        """
+        data = snapshot.load(self._data_file)
+        if data is None:
+            return False
+        self._load(data, show=True)
+        return True
+
+    def _load(self, data: snapshot.Snapshot, show: bool = False) -> None:
+        """Load the tiles and the frontier of a snapshot.
+
+        :param data: snapshot.
+        :param show: logs the progress.
+        """
+        self._database.remove_tile(0, 0)
+        self._grid.set(0, 0, grid.NONE)
+        self._grid.set_many(data.tiles['x'], data.tiles['y'], grid.FULL, data.tiles['code'])
+        self._grid.set_many(data.slots['x'], data.slots['y'], grid.SLOT)
+        for i, (x, y, code) in enumerate(data.tiles.tolist(), 1):
+            tile = Tile.from_code(x, y, code)
+            self._database.add_tile(tile)
+            self._signatures.add(tile)
+            self._closure.add(tile)
+            self._features.add(tile)
+            if show:
+                self._log_progress(i, len(data.tiles))
+        self._features.commit()
+        slots = [Tile(x, y) for x, y in zip(data.slots['x'].tolist(), data.slots['y'].tolist())]
+        for slot in slots:
+            self._database.add_tile(slot)
+        self._frontier.load(slots, data.slots['edges'])
+
+    def _log_progress(self, nb_loaded: int, nb_tiles: int) -> None:
+        """Log the progress of a load every LOAD_PROGRESS_PERCENT of the tiles.
+
+        :param nb_loaded: tiles loaded so far.
+        :param nb_tiles: tiles to load.
+        """
+        step = -(-nb_tiles * LOAD_PROGRESS_PERCENT // 100)
+        if nb_loaded % step == 0 and nb_loaded < nb_tiles:
+            self._logger(f"Loading Database... {100 * nb_loaded // nb_tiles}% ({nb_loaded}/{nb_tiles} tiles)")
+
+    def get_snapshot(self) -> snapshot.Snapshot:
+        """Copy the tiles and the frontier of the board.
+
+        :return: snapshot, that can rebuild the board with Board(logger, data=...).
+        """
+        # Tiles in the order of the database, each one next to a previous one like in the data file
+        tiles = [tile for tile in self._database.get_tiles() if tile.state == tile.State.FULL]
+        positions, edges = self._grid.get_frontier()
+        slots = np.zeros(len(positions), dtype=snapshot.SLOT_DTYPE)
+        slots['x'], slots['y'], slots['edges'] = positions[:, 0], positions[:, 1], edges
+        return snapshot.Snapshot(np.array([(tile.x, tile.y, tile.code) for tile in tiles], dtype=snapshot.TILE_DTYPE),
+                                 slots)
+
+    def _save_snapshot(self) -> None:
+        """Write the binary snapshot matching the data file."""
+        try:
+            snapshot.save(self._data_file, self.get_snapshot())
+        except OSError as e:
+            self._logger(f"Snapshot not saved: {e}")
 
     @staticmethod
     def _tr(x, y):
         return x * 0.866, y + x * 0.5  # cos(pi/6) ~= 0.866025...
 
-    @staticmethod
-    def _inv_tr(x, y):
-        return x / 0.866, y - x * 0.5  # cos(pi/6) ~= 0.866025...
-
-    def render(self, fast_mode: bool = False):
-        """Draw the board."""
-
-        def _get_midpoint(t_x, t_y):
-            return [(t_x[0] + t_y[0]) / 2, (t_x[1] + t_y[1]) / 2]
+    def render(self, fast_mode: bool = False) -> str:
+        """Draw the board. Only the chunks changed since the last render are drawn again, see ChunkRenderer.
 
+        :param fast_mode: closed tiles drawn as gray hexagons, without coordinates.
+        :return: overview image written, the full resolution page being the .html file next to it.
+        """
         t0 = time.time()
-        # Determine aspect ratio
-        x_min, x_max, y_min, y_max = 0, 0, 0, 0
-        for tile in self._database.get_tiles():
-            x, y = self._tr(*tile.get_pos())
-            x_min, x_max, y_min, y_max = min(x, x_min), max(x, x_max), min(y, y_min), max(y, y_max)
-        x_range, y_range = (x_max - x_min + 1) ** 2 / (y_max - y_min + 1), (x_max - x_min + 1)
-
-        # Create canvas image
-        grid_helper = GridHelperCurveLinear(
-            (self._tr, self._inv_tr), grid_locator1=MaxNLocator(integer=True), grid_locator2=MaxNLocator(integer=True)
-        )
-        fig = plt.figure(figsize=[x_range, y_range])
-        fig.add_subplot(1, 1, 1, axes_class=Axes, grid_helper=grid_helper).grid()
-        fig.set_facecolor("black")
-        fig.tight_layout()
-        ax = plt.axes()
-        ax.set_facecolor("black")
+        if self._renderer is None:
+            from renderer import ChunkRenderer
+            self._renderer = ChunkRenderer(self._database.get_tile, COLOR_MAPPING, self._tr)
+            self._renderer.update(tile.get_pos() for tile in self._database.get_tiles())
 
         self._logger("Rendering board...")
-        s = 0.5 / m.cos(m.pi / 6) - 2 * 0.01  # 0.01 is the width of the triangles' lines (probably)
-        for tile in self._database.get_tiles():
-            x, y = self._tr(*tile.get_pos())
-            hexagon_coord = [[x + s, y], [x + s * m.cos(m.pi / 3), y + s * m.sin(m.pi / 3)],
-                             [x + s * m.cos(m.pi * 2 / 3), y + s * m.sin(m.pi * 2 / 3)], [x - s, y],
-                             [x + s * m.cos(-m.pi * 2 / 3), y + s * m.sin(-m.pi * 2 / 3)],
-                             [x + s * m.cos(-m.pi / 3), y + s * m.sin(-m.pi / 3)], [x + s, y]]
-
-            if fast_mode and len([t for t in tile.get_neighbors() if t and t.state == Tile.State.FULL]) == 6:
-                if tile.state != Tile.State.EMPTY:
-                    xs, ys = zip(*hexagon_coord)
-                    plt.fill(xs, ys, color='gray')
-                    continue
-
-            # For each side of the hexagon
-            for i in range(6):
-                m1 = _get_midpoint(hexagon_coord[0 + i], [x, y])
-                m2 = _get_midpoint(hexagon_coord[1 + i], [x, y])
-                t_coord = [m1] + hexagon_coord[0 + i:2 + i] + [m2] + [m1]
-                xs, ys = zip(*t_coord)
-                if tile.state == Tile.State.EMPTY:
-                    plt.plot(xs, ys, color='gray')
-                elif tile.state == Tile.State.FULL:
-                    getattr(tile, 'e' + str(i))
-                    plt.fill(xs, ys, color=COLOR_MAPPING[getattr(tile, 'e' + str(i))])
-            plt.text(x, y, f"{tile.get_pos()}", color="white", ha='center', va='center')
-
         img_title = "board.png"
         if fast_mode:
             img_title = "board_fast.png"
-        plt.savefig(os.path.join(os.path.dirname(sys.argv[0]), img_title))
-
-        plt.close()
+        path = os.path.join(os.path.dirname(self._data_file), img_title)
+        positions = self._grid.get_positions()
+        xs, ys = self._tr(positions[:, 0], positions[:, 1])
+        closed = {(x, y) for x, y in self._grid.get_closed(grid.FULL).tolist()} if fast_mode else set()
+        nb_chunks = self._renderer.render(path, (xs.min(), xs.max(), ys.min(), ys.max()), closed, fast_mode)
+        if self._profiler.enabled:
+            self._profiler.count("render.chunks", nb_chunks)
         t1 = time.time()
-        self._logger(f"Board rendered | Time: {(t1 - t0):.2f}s.")
+        self._logger(f"Board rendered ({nb_chunks} chunks drawn) | Time: {(t1 - t0):.2f}s. Full resolution: "
+                     f"{os.path.splitext(img_title)[0]}.html")
+        return path
+
+    @property
+    def last_placement(self) -> Optional[Tile]:
+        """Last tile placed that can be undone, None if none."""
+        return self._history[-1].tile if len(self._history) > self._history_floor else None
 
     def place_tile(self, new_tile: Tile, show: bool = True) -> Tile:
         """Add a tile to the board if allowed.
@@ -143,152 +278,430 @@ class Board:
             raise Exception(f"Cannot add tile {new_tile.get_pos()}: slot given not empty")
         if new_tile.Edge.EMPTY in new_tile.get_edges():
             raise Exception(f"Cannot add tile {new_tile.get_pos()}: edge given is empty")
+        self._redo.clear()
+        return self._place(new_tile, show)
+
+    def undo(self, show: bool = True):
+        """Revert the last tile placement, along with the empty slots it created.
+
+        :param show: logs boolean.
+        """
+        if len(self._history) <= self._history_floor:
+            if show:
+                self._logger("No last placement")
+            return
+        placement = self._history.pop()
+        x, y = placement.tile.get_pos()
+        self._redo.append(Tile.from_code(x, y, placement.tile.code))
+        self._revert(placement)
+        if self._journal is not None:
+            self._journal.record_undo()
+        if show:
+            self._logger(f"Last tile ({x, y}) removed from board")
+
+    def redo(self, show: bool = True):
+        """Place again the last tile undone.
+
+        :param show: logs boolean.
+        """
+        if not self._redo:
+            if show:
+                self._logger("Nothing to redo")
+            return
+        self._place(self._redo.pop(), show)
+
+    @contextmanager
+    def transaction(self) -> Iterator['Board']:
+        """Try placements: the ones made within are reverted when leaving, without being journaled nor rendered.
+
+        Undo only reverts the placements of the transaction, redo is not available.
+        """
+        journal, renderer, redo, floor = self._journal, self._renderer, self._redo, self._history_floor
+        self._journal, self._renderer, self._redo, self._history_floor = None, None, [], len(self._history)
+        try:
+            yield self
+        finally:
+            while len(self._history) > self._history_floor:
+                self._revert(self._history.pop())
+            self._journal, self._renderer, self._redo, self._history_floor = journal, renderer, redo, floor
+
+    def _place(self, new_tile: Tile, show: bool) -> Tile:
+        """Fill a slot already validated, journal it and keep what changed for undo."""
+        if self._journal is not None and len(self._journal) >= JOURNAL_COMPACT_SIZE:
+            self._compact()
 
         # Add eventual new slots and verify if edge matches
+        new_slots: List[Tile] = []
         for i in range(6):
             n_coord = new_tile.x + NEIGHBORS_COORD[i]["x"], new_tile.y + NEIGHBORS_COORD[i]["y"]
             n_tile = self._database.get_tile(*n_coord)
             if not n_tile:
-                self._database.add_tile(Tile(*n_coord))
-            elif show and n_tile.state == Tile.State.FULL and not self._edge_match(
-                    getattr(new_tile, 'e' + str(i)), getattr(n_tile, 'e' + str((i + 3) % 6))
-            ):
+                new_slots.append(Tile(*n_coord))
+                self._database.add_tile(new_slots[-1])
+                self._grid.set(*n_coord, grid.SLOT)
+            elif show and n_tile.state == Tile.State.FULL and not EDGE_MATCH[
+                    new_tile.edge(i)][n_tile.edge((i + 3) % 6)
+            ]:
                 self._logger(f"Edge {i + 1} with {n_coord} does not match")
         db_tile = self._database.get_tile(*new_tile.get_pos())
-        db_tile.e0, db_tile.e1, db_tile.e2, db_tile.e3, db_tile.e4, db_tile.e5 = [Tile.Edge(e) for e in
-                                                                                  new_tile.get_edges()]
+        db_tile.code = new_tile.code
         db_tile.state = Tile.State.FULL
-        self.last_placement = new_tile
+        self._grid.set(*db_tile.get_pos(), grid.FULL, db_tile.code)
+        self._signatures.add(db_tile)
+        self._closure.add(db_tile)
+        closed_groups = self._features.add(db_tile)
+        self._history.append(_Placement(db_tile, new_slots))
+        if self._profiler.enabled:
+            self._profiler.count("place_tile.new_slots", len(new_slots))
+        if self._journal is not None:
+            self._journal.record_placement(db_tile)
+
+        # Update the frontier
+        self._frontier.remove(db_tile)
+        for i, n in enumerate(db_tile.neighbors):
+            if n.state != Tile.State.EMPTY:
+                continue
+            if n in new_slots:
+                self._frontier.add(n)
+            else:
+                self._frontier.set_edge(n, (i + 3) % 6, db_tile.edge(i))
+        if self._renderer is not None:
+            self._renderer.update([db_tile.get_pos()] + [n.get_pos() for n in db_tile.neighbors])
+
         if show:
             self._logger(f"Tile {new_tile.get_pos()} placed")
+            for group in closed_groups:
+                self._logger(f"{group.feature.name.capitalize()} of {group.size} tiles closed")
             # Verify if neighbors are closed slots with no candidates seen before
-            for n in [tile for tile in db_tile.get_neighbors() if tile.state == Tile.State.EMPTY]:
-                if len([t for t in n.get_neighbors() if t is not None and t.state == Tile.State.FULL]) == 6:
-                    n_c = self.find_candidate([getattr(n.get_neighbors()[j], 'e' + str((j + 3) % 6)) for j in range(6)])
+            for n in [tile for tile in db_tile.neighbors if tile.state == Tile.State.EMPTY]:
+                if self._frontier.count(n) == 6:
+                    n_c = self.find_candidate([n.neighbor(j).edge((j + 3) % 6) for j in range(6)])
                     if not n_c:
                         self._logger(f"Warning: {n.get_pos()} closed but candidates found")
                     else:
                         self._logger(f"{n.get_pos()} closed, {len(n_c)} candidates found")
         return db_tile
 
-    def undo(self):
-        """Delete last tile placement."""
-        if not self.last_placement:
-            self._logger("No last placement")
-            return
-        x, y = self.last_placement.get_pos()
-        self._database.remove_tile(x, y)
-        self._database.add_tile(Tile(x, y))
-        self.last_placement = None
-        self._logger(f"Last tile ({x, y}) removed from board")
+    def _revert(self, placement: _Placement) -> None:
+        """Empty the slot of a placement and remove the slots it created, the inverse of _place."""
+        tile = placement.tile
+        positions = [tile.get_pos()] + [n.get_pos() for n in tile.neighbors]
+        self._signatures.remove(tile)
+        self._closure.remove(tile)
+        self._features.undo()
+        for slot in placement.new_slots:
+            self._frontier.remove(slot)
+            self._database.remove_tile(*slot.get_pos())
+            self._grid.set(*slot.get_pos(), grid.NONE)
+        tile.code = 0
+        tile.state = Tile.State.EMPTY
+        self._grid.set(*tile.get_pos(), grid.SLOT)
+        self._frontier.add(tile)
+        for i, n in enumerate(tile.neighbors):
+            if n and n.state == Tile.State.EMPTY:
+                self._frontier.set_edge(n, (i + 3) % 6, Tile.Edge.EMPTY)
+        if self._renderer is not None:
+            self._renderer.update(positions)
 
     def save_data(self):
-        """Save all tiles in a file."""
-        with open(os.path.join(os.path.dirname(sys.argv[0]), DATA_FILE_NAME), 'w') as file:
-            tiles = [tile for tile in self._database.get_tiles() if tile.state == tile.State.FULL]
+        """Save all tiles. Placements are journaled as they happen, the journal is compacted once large enough."""
+        if self._journal is None:
+            self._logger("Nothing to save: board held in memory only")
+            return
+        nb_entries = len(self._journal)
+        if nb_entries >= JOURNAL_COMPACT_SIZE:
+            self._compact()
+        self._logger(f"Saved successfully: {nb_entries} placements journaled since the last compaction")
+
+    def _compact(self):
+        """Write all tiles in the data file, then refresh the snapshot and start a new journal."""
+        tiles = [tile for tile in self._database.get_tiles() if tile.state == tile.State.FULL]
+        with open(self._data_file + '.tmp', 'w') as file:
             for tile in tiles:
-                line = f"{tile.x};{tile.y};{tile.e0};{tile.e1};{tile.e2};{tile.e3};{tile.e4};{tile.e5}\n"
+                line = ";".join(str(n) for n in [tile.x, tile.y] + [int(e) for e in tile.get_edges()]) + "\n"
                 file.write(line)
-        self._logger(f"{len(tiles)} tiles saved successfully")
+        os.replace(self._data_file + '.tmp', self._data_file)
+        self._save_snapshot()
+        self._journal.reset()
+        self._history.clear()  # the journal no longer holds the placements to undo
+        self._features.commit()
+        self._logger(f"{len(tiles)} tiles compacted in {os.path.basename(self._data_file)}")
 
     def help_me(self, edges: List[Tile.Edge]) -> (list, list):
         """The core of the added value. It only considers empty slots with at least 2 neighbors fulfilled.
         If one edge doesn't match, the candidate is discarded for that slot (except 5/6 matches).
 
+        Closure is the probability that the next tile fits the hardest empty slot left around the placement (the slot
+        itself for a 5/6 match), given the distribution of the tiles placed. Merges and closures count the connected
+        features joined together and left with no open end by the placement, group the largest one the tile joins.
+
         :param list edges: list of edges of the tile.
         :return: matches with no conflict & 5/6 matches.
         """
+        matches, five_of_six_matches = self.iter_help(edges)
+        return list(matches), five_of_six_matches
 
-        class _Match(NamedTuple):
-            """Link data to a match."""
-            tile: Tile
-            n_neighbors: int
-            value: float
-            distance: float
-
-        class _FiveOfSixMatch(NamedTuple):
-            """Link data to a 5/6 match."""
-            tile: Tile
-            ideal_occurrence: int
-
-        # List of all empty slots matching
-        matches: List[_Match] = []
-        five_of_six_matches: List[_FiveOfSixMatch] = []
-
-        # For each slot
-        for slot in [tile for tile in self._database.get_tiles() if tile.state == tile.State.EMPTY]:
-            neighbors_num = len([t for t in slot.get_neighbors() if t is not None and t.state == Tile.State.FULL])
-            if neighbors_num < 2:
-                continue
-            # For each rotation of the tile to place
-            for i in range(self._rotations(edges)):
-                candidate = Tile(slot.x, slot.y, edges[i:] + edges[:i])
-                candidate_value = 0
-                conflicts = 0
-                for j, slot_n in enumerate(slot.get_neighbors()):
-                    if slot_n and slot_n.state == Tile.State.FULL:
-                        c_e, s_e = getattr(candidate, 'e' + str(j)), getattr(slot_n, 'e' + str((j + 3) % 6))
-                        if not self._edge_match(c_e, s_e):
-                            conflicts += 1
-                            if conflicts > 1:
-                                break
-                            if not self._edge_compatible(c_e, s_e):
-                                conflicts = 6  # 2 would work too, as long as it denies the 5/6 conditions
-                                break
-                        # What is matched (from the existing tile and from the candidate)
-                        candidate_value += EDGE_VALUE[getattr(slot_n, 'e' + str((j + 3) % 6))]
-                        candidate_value += EDGE_VALUE[getattr(candidate, 'e' + str(j))]
-                    else:
-                        # What is left behind from the candidate
-                        candidate_value -= EDGE_VALUE[getattr(candidate, 'e' + str(j))]
-                # 5/6 matches
-                if conflicts == 1 and neighbors_num == 6:
-                    ideal_edges = [getattr(slot.get_neighbors()[j], 'e' + str((j + 3) % 6)) for j in range(6)]
-                    five_of_six_matches.append(_FiveOfSixMatch(candidate, len(self.find_candidate(ideal_edges))))
-                    continue
-                if conflicts:
-                    continue
-
-                matches.append(_Match(
-                    candidate, neighbors_num, float(str(candidate_value / neighbors_num)[:4]),
-                    float(str(m.sqrt(sum(coord * coord for coord in self._tr(
-                        candidate.x - self.m_x, candidate.y - self.m_y
-                    ))))[:4])
-                ))
+    def rank_help(self, edges: List[Tile.Edge], top: int = TOP_MATCHES) -> Tuple[Ranking, List[FiveOfSixMatch]]:
+        """help_me keeping only the best matches, whatever their number: see Ranking.
+
+        :param edges: edges of the tile.
+        :param top: matches kept for each number of neighbors.
+        :return: ranking of the matches with no conflict & 5/6 matches.
+        """
+        matches, five_of_six_matches = self.iter_help(edges)
+        ranking = Ranking(top)
+        for match in matches:
+            ranking.add(match)
+        return ranking, five_of_six_matches
+
+    def iter_help(self, edges: List[Tile.Edge]) -> Tuple[Iterator[Match], List[FiveOfSixMatch]]:
+        """help_me with the matches evaluated as they are iterated, in the order of the frontier.
+
+        :param edges: edges of the tile.
+        :return: iterator of the matches with no conflict, valid until the board changes & 5/6 matches.
+        """
+        # Each rotation of the tile to place
+        rotated_edges = [Tile.unpack(Tile.rotate_code(Tile.pack(edges), i)) for i in range(self._rotations(edges))]
+
+        # Evaluate each rotation on each slot with at least 2 neighbors it may fit, in one pass
+        rows = self._frontier.find_rows(rotated_edges, EDGE_MATCHING, 2)
+        neighbor_edges, n_neighbors = self._frontier.get_arrays(rows)
+        scores = self._scoring.score(rotated_edges, neighbor_edges, n_neighbors)
+        if self._profiler.enabled:
+            self._profiler.count("help_me.slots", len(rows))
+            self._profiler.count("help_me.rotations", len(rotated_edges))
+            self._profiler.count("help_me.placements", len(rows) * len(rotated_edges))
+
+        ks, rotations = np.nonzero(scores.five_of_six)
+        five_of_six_matches = self._five_of_six_matches(rotated_edges, rows[ks], rotations)
+        ks, rotations = np.nonzero(scores.matches)
+        matches = self._iter_matches(rotated_edges, rows[ks], rotations, scores.values[ks, rotations], n_neighbors[ks])
         return matches, five_of_six_matches
 
+    def help_batch(self, tiles: List[List[Tile.Edge]],
+                   top: int = TOP_MATCHES) -> List[Tuple[Ranking, List[FiveOfSixMatch]]]:
+        """rank_help of a queue of tiles. The slots are grouped once by the edges facing them, each distinct tile being
+        scored against the groups rather than the slots, and tiles equal up to a rotation are searched once. Only the
+        matches whose value lets them enter the ranking get their closure and connected features evaluated.
+
+        :param tiles: edges of each tile.
+        :param top: matches kept for each number of neighbors.
+        :return: ranking of the matches with no conflict & 5/6 matches of each tile, in the order given; a tile equal to
+            a previous one up to a rotation shares its answer, empty for an empty queue.
+        """
+        if not tiles:
+            return []
+        patterns, rows, offsets = self._frontier.get_patterns(2)
+        n_neighbors = np.count_nonzero(patterns, axis=1)
+        answers: Dict[int, Tuple[Ranking, List[FiveOfSixMatch]]] = {}
+        if self._profiler.enabled:
+            self._profiler.count("help_batch.tiles", len(tiles))
+            self._profiler.count("help_batch.slots", len(rows))
+            self._profiler.count("help_batch.patterns", len(patterns))
+
+        results = []
+        for edges in tiles:
+            code = Tile.canonical(Tile.pack(edges))
+            if code not in answers:
+                rotated_edges = [Tile.unpack(Tile.rotate_code(Tile.pack(edges), i))
+                                 for i in range(self._rotations(edges))]
+                scores = self._scoring.score(rotated_edges, patterns, n_neighbors)
+                if self._profiler.enabled:
+                    self._profiler.count("help_batch.placements", len(patterns) * len(rotated_edges))
+
+                slot_rows, rotations, groups = _expand(scores.five_of_six, rows, offsets)
+                five_of_six_matches = self._five_of_six_matches(rotated_edges, slot_rows, rotations)
+                slot_rows, rotations, groups = _expand(scores.matches, rows, offsets)
+                answers[code] = self._rank_matches(rotated_edges, slot_rows, rotations,
+                                                   scores.values[groups, rotations], n_neighbors[groups], top), \
+                    five_of_six_matches
+            results.append(answers[code])
+        return results
+
+    def _five_of_six_matches(self, rotated_edges: List[List[Tile.Edge]], rows: np.ndarray,
+                             rotations: np.ndarray) -> List[FiveOfSixMatch]:
+        """5/6 matches of a tile.
+
+        :param rotated_edges: edges of each rotation of the tile.
+        :param rows: frontier row of each 5/6 match.
+        :param rotations: rotation of each 5/6 match.
+        :return: 5/6 matches.
+        """
+        five_of_six_matches = []
+        for row, i in zip(rows, rotations):
+            slot = self._frontier.get_slot(row)
+            ideal_edges = [slot.neighbor(j).edge((j + 3) % 6) for j in range(6)]
+            five_of_six_matches.append(FiveOfSixMatch(
+                Tile(slot.x, slot.y, rotated_edges[i]), len(self.find_candidate(ideal_edges)),
+                round(self._closure.probability(ideal_edges), 3)
+            ))
+        if self._profiler.enabled:
+            self._profiler.count("help_me.five_of_six", len(five_of_six_matches))
+        return five_of_six_matches
+
+    def _iter_matches(self, rotated_edges: List[List[Tile.Edge]], rows: np.ndarray, rotations: np.ndarray,
+                      values: np.ndarray, n_neighbors: np.ndarray) -> Iterator[Match]:
+        """Matches with no conflict of a tile, evaluated as they are iterated.
+
+        :param rotated_edges: edges of each rotation of the tile.
+        :param rows: frontier row of each match.
+        :param rotations: rotation of each match.
+        :param values: value of each match, see ScoringEngine.score.
+        :param n_neighbors: number of full neighbors of each match.
+        :return: matches.
+        """
+        for row, i, value, neighbors_num in zip(rows, rotations, values, n_neighbors):
+            neighbors_num = int(neighbors_num)
+            yield self._match(rotated_edges[i], row, neighbors_num, round(int(value) / neighbors_num, 2))
+
+    def _rank_matches(self, rotated_edges: List[List[Tile.Edge]], rows: np.ndarray, rotations: np.ndarray,
+                      values: np.ndarray, n_neighbors: np.ndarray, top: int) -> Ranking:
+        """Ranking of the matches with no conflict of a tile, like rank_help. The matches are ranked by decreasing
+        value, each one being evaluated only if its value lets it enter the ranking.
+
+        :param rotated_edges: edges of each rotation of the tile.
+        :param rows: frontier row of each match, sorted like a scan of the frontier.
+        :param rotations: rotation of each match.
+        :param values: value of each match, see ScoringEngine.score.
+        :param n_neighbors: number of full neighbors of each match.
+        :param top: matches kept for each number of neighbors.
+        :return: ranking.
+        """
+        ranking = Ranking(top)
+        order = np.argsort(-values / n_neighbors, kind='stable')  # matches of equal value keep the frontier order
+        for row, i, value, neighbors_num in zip(rows[order].tolist(), rotations[order].tolist(),
+                                                values[order].tolist(), n_neighbors[order].tolist()):
+            value = round(value / neighbors_num, 2)
+            if ranking.may_keep(neighbors_num, value):
+                ranking.add(self._match(rotated_edges[i], row, neighbors_num, value))
+            else:
+                ranking.skip()
+        return ranking
+
+    def _match(self, edges: List[Tile.Edge], row: int, n_neighbors: int, value: float) -> Match:
+        """Evaluate a match with no conflict.
+
+        :param edges: edges of the tile, rotated.
+        :param row: frontier row of the slot.
+        :param n_neighbors: number of full neighbors of the slot.
+        :param value: value of the match.
+        :return: match.
+        """
+        slot = self._frontier.get_slot(row)
+        candidate = Tile(slot.x, slot.y, edges)
+        merges, closures, group = self._features.evaluate(candidate, slot)
+        if self._profiler.enabled:
+            self._profiler.count("help_me.matches")
+        return Match(
+            candidate, n_neighbors, value, round(m.hypot(*self._tr(candidate.x - self.m_x, candidate.y - self.m_y)), 1),
+            round(self._closure_probability(candidate, slot), 3), merges, closures, group
+        )
+
+    def _closure_probability(self, candidate: Tile, slot: Tile) -> float:
+        """Probability that the next tile fits the hardest empty slot left around a placement.
+
+        :param candidate: tile placed.
+        :param slot: empty slot the tile is placed on.
+        :return: probability, 1 if no empty slot is left around.
+        """
+        probability = 1.0
+        for i, n in enumerate(slot.neighbors):
+            if n is not None and n.state == Tile.State.FULL:
+                continue
+            facing = self._frontier.get_edges(n) if n is not None else [Tile.Edge.EMPTY] * 6
+            facing[(i + 3) % 6] = candidate.edge(i)
+            probability = min(probability, self._closure.probability(facing))
+        return probability
+
+    def get_placements(self, edges: List[Tile.Edge]) -> List[Tuple[Tile, int]]:
+        """Placements of a tile with no conflict, on the empty slots with at least 2 neighbors fulfilled.
+
+        :param edges: edges of the tile.
+        :return: list of (tile placed, value), the value adding what is matched and removing what is left behind.
+        """
+        rotated_edges = [Tile.unpack(Tile.rotate_code(Tile.pack(edges), i)) for i in range(self._rotations(edges))]
+        rows = self._frontier.find_rows(rotated_edges, EDGE_MATCHING, 2)
+        neighbor_edges, n_neighbors = self._frontier.get_arrays(rows)
+        scores = self._scoring.score(rotated_edges, neighbor_edges, n_neighbors)
+        placements = []
+        for k, i in zip(*np.nonzero(scores.matches)):
+            slot = self._frontier.get_slot(rows[k])
+            placements.append((Tile(slot.x, slot.y, rotated_edges[i]), int(scores.values[k, i])))
+        return placements
+
+    def plan(self, tiles: List[List[Tile.Edge]], depth: Optional[int] = None, beam_width: int = planner.BEAM_WIDTH,
+             time_budget: float = planner.TIME_BUDGET, workers: Optional[int] = None) -> Optional[planner.Plan]:
+        """Search the best sequence of placements for the next tiles of the stack, see planner.plan.
+
+        :param tiles: edges of the next tiles, in the order they come.
+        :param depth: number of tiles to plan, all of them by default.
+        :param beam_width: plans kept at each step.
+        :param time_budget: seconds after which the best plan found so far is returned.
+        :param workers: number of processes, one per core by default.
+        :return: best plan, None if the first tile cannot be placed without conflict.
+        """
+        return planner.plan(self, tiles[:depth], beam_width, time_budget, workers)
+
     def find_candidate(self, edges: List[Tile.Edge]) -> list:
         """Says if the candidate given is already on the board or not.
 
         :return: list of matches coordinates.
         """
-        matches: list = []
-        for db_tile in [tile for tile in self._database.get_tiles() if tile.state == tile.State.FULL]:
-            # Determine if the tile is symmetrical to avoid repetitions
-            db_edges = db_tile.get_edges()
-            for i in range(self._rotations(edges)):
-                valid_tile = True
-                for j in range(6):
-                    if not self._edge_match(db_edges[j], edges[(i + j) % 6]):
-                        valid_tile = False
-                        break
-                if valid_tile:
-                    matches.append(db_tile.get_pos())
-                    break
-        return matches
+        tiles = self._signatures.find_compatible(edges)
+        if self._profiler.enabled:
+            self._profiler.count("find_candidate.tiles", len(tiles))
+        return [tile.get_pos() for tile in tiles]
+
+    def get_group(self, x: int, y: int, feature: Tile.Edge) -> Optional[Group]:
+        """Retrieve the connected feature a tile belongs to.
+
+        :param x: x coordinate.
+        :param y: y coordinate.
+        :param feature: feature on one of the edges of the tile.
+        :return: feature, size and open ends of the group, None if the tile is not full or has no such feature.
+        """
+        return self._features.get_group(x, y, feature)
+
+    def set_profiling(self, enabled: bool) -> None:
+        """Time the operations and count the work of their inner loops, or stop. Disabled, nothing is timed.
+
+        :param enabled: profiling boolean.
+        """
+        if enabled:
+            self._profiler.enable(self, PROFILED)
+        else:
+            self._profiler.disable(self, PROFILED)
+
+    def report_profile(self, path: Optional[str] = None) -> str:
+        """Log what was profiled so far and write it as JSON.
+
+        :param path: file written, profile.json next to the data file by default.
+        :return: file written.
+        """
+        path = path or os.path.join(os.path.dirname(self._data_file), PROFILE_FILE_NAME)
+        for line in self._profiler.report():
+            self._logger(line)
+        self._profiler.dump(path)
+        self._logger(f"Profile written in {path}")
+        return path
+
+    def get_cache_info(self) -> CacheInfo:
+        """Statistics of the cache of find_candidate.
+
+        :return: hits, misses, invalidations and size.
+        """
+        return self._signatures.cache_info()
+
+    def get_size(self) -> int:
+        """Number of tiles and slots on the board."""
+        return len(self._database)
 
     def find_tile(self, edges: List[Tile.Edge]) -> list:
         """Says if the tile given is already on the board or not.
 
         :return: list of matches coordinates.
         """
-        matches: list = []
-        for db_tile in [tile for tile in self._database.get_tiles() if tile.state == tile.State.FULL]:
-            for i in range(self._rotations(edges)):
-                if db_tile.get_edges() == edges[i:] + edges[:i]:
-                    matches.append(db_tile.get_pos())
-                    break
-        return matches
+        return [tile.get_pos() for tile in self._signatures.find(edges)]
 
     @staticmethod
     def _edge_match(e1: Tile.Edge, e2: Tile.Edge) -> bool:
@@ -359,3 +772,31 @@ class Board:
 #                        break
 #            if not matches:
 #                print(db_tile_ref.get_pos())
+
+
+# Edge relations and matched value precomputed over all the pairs of edges, indexed by [e1][e2]
+EDGE_MATCH: List[List[bool]] = [[Board._edge_match(e1, e2) for e2 in Tile.Edge] for e1 in Tile.Edge]
+# Full edges matched by each edge, indexed by [e1]
+EDGE_MATCHING: List[List[Tile.Edge]] = [[e2 for e2 in Tile.Edge if e2 != Tile.Edge.EMPTY and EDGE_MATCH[e1][e2]]
+                                        for e1 in Tile.Edge]
+EDGE_COMPATIBLE: List[List[bool]] = [[Board._edge_compatible(e1, e2) for e2 in Tile.Edge] for e1 in Tile.Edge]
+EDGE_PAIR_VALUE: List[List[int]] = [
+    [EDGE_VALUE.get(e1, 0) + EDGE_VALUE.get(e2, 0) for e2 in Tile.Edge] for e1 in Tile.Edge
+]
+
+
+def _expand(hits: np.ndarray, rows: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Placements on the slots of the patterns a tile fits, see Frontier.get_patterns.
+
+    :param hits: (U, R) whether each rotation fits each pattern.
+    :param rows: rows of the slots grouped by pattern.
+    :param offsets: (U + 1,) start of the rows of each pattern.
+    :return: row, rotation and pattern of each placement, sorted by row then rotation like a scan of the frontier.
+    """
+    patterns, rotations = np.nonzero(hits)
+    sizes = offsets[patterns + 1] - offsets[patterns]
+    starts = np.repeat(offsets[patterns] - (np.cumsum(sizes) - sizes), sizes)
+    slot_rows = rows[starts + np.arange(sizes.sum())]
+    patterns, rotations = np.repeat(patterns, sizes), np.repeat(rotations, sizes)
+    order = np.lexsort((rotations, slot_rows))
+    return slot_rows[order], rotations[order], patterns[order]
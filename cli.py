@@ -0,0 +1,213 @@
+"""Command line interface, without the window.
+
+Queries are read one per line from the input, answers written as JSON lines on the standard output, logs on the
+standard error. Values are separated by ';' (like DATA.csv), ',' or spaces, lines starting with '#' are skipped.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from board import Board, FiveOfSixMatch
+from journal import PLACEMENT, UNDO
+from ranking import Ranking
+from tile import Tile
+
+logger = logging.getLogger("root")
+
+TOP_MATCHES = 10
+
+
+def parse_line(line: str) -> List[str]:
+    """Split a line of values.
+
+    :param line: line read.
+    :return: values, empty for a blank line or a comment.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return []
+    return [value for value in re.split(r'[;,\s]+', line) if value]
+
+
+def parse_edges(values: List[str]) -> List[Tile.Edge]:
+    """Read the 6 edges of a tile.
+
+    :param values: edges values.
+    :return: edges.
+    :raise Exception: not 6 valid edges.
+    """
+    if len(values) != 6:
+        raise Exception(f"6 edges expected, {len(values)} given")
+    try:
+        return [Tile.Edge(int(value)) for value in values]
+    except ValueError:
+        raise Exception(f"Edge(s) {values} not valid")
+
+
+def parse_tile(values: List[str]) -> Tile:
+    """Read a tile: x, y and its 6 edges.
+
+    :param values: coordinates and edges values.
+    :return: tile.
+    :raise Exception: invalid coordinates or edges.
+    """
+    if len(values) != 8:
+        raise Exception(f"x, y and 6 edges expected, {len(values)} values given")
+    try:
+        x, y = int(values[0]), int(values[1])
+    except ValueError:
+        raise Exception(f"Coordinates {values[:2]} not valid")
+    return Tile(x, y, parse_edges(values[2:]))
+
+
+def tile_to_dict(tile: Tile) -> Dict:
+    """Coordinates and edges of a tile."""
+    return {"x": tile.x, "y": tile.y, "edges": [int(e) for e in tile.get_edges()]}
+
+
+def help_to_dict(board: Board, edges: List[Tile.Edge], top: int = TOP_MATCHES,
+                 result: Optional[Tuple[Ranking, List[FiveOfSixMatch]]] = None) -> Dict:
+    """Best placements of a tile, ranked like in the window.
+
+    :param board: board.
+    :param edges: edges of the tile.
+    :param top: number of matches kept.
+    :param result: ranking & 5/6 matches of the tile already searched, see Board.help_batch.
+    :return: matches, 5/6 matches and whether the tile was seen before.
+    """
+    ranking, five_of_six_matches = board.rank_help(edges, top) if result is None else result
+    return {
+        "edges": [int(e) for e in edges],
+        "matches": [
+            dict(tile_to_dict(match.tile), neighbors=match.n_neighbors, value=match.value, distance=match.distance,
+                 closure=match.closure, merges=match.merges, closures=match.closures, group=match.group)
+            for match in ranking.get_best(top)
+        ],
+        "five_of_six": [
+            dict(tile_to_dict(match.tile), ideal_occurrence=match.ideal_occurrence, closure=match.closure)
+            for match in five_of_six_matches
+        ],
+        "new_tile": not board.find_tile(edges),
+    }
+
+
+def _queries(file: TextIO) -> Iterator[Tuple[int, List[str]]]:
+    """Line numbers and values of the queries of a stream, as they come."""
+    for number, line in enumerate(file, 1):
+        values = parse_line(line)
+        if values:
+            yield number, values
+
+
+def _answer(number: int, function: Callable[[], Dict]) -> None:
+    """Write the answer to a query, or its error."""
+    try:
+        answer = function()
+    except Exception as e:
+        answer = {"line": number, "error": str(e)}
+    print(json.dumps(answer), flush=True)
+
+
+def _help_batch(board: Board, queries: Iterator[Tuple[int, List[str]]], top: int) -> int:
+    """Answer help queries once all of them are read, the tiles being searched together, see Board.help_batch.
+
+    :return: number of queries.
+    """
+    queries = list(queries)
+    tiles: Dict[int, List[Tile.Edge]] = {}
+    for number, values in queries:
+        try:
+            tiles[number] = parse_edges(values)
+        except Exception:
+            pass  # answered with its error below
+    results = dict(zip(tiles, board.help_batch(list(tiles.values()), top)))
+    for number, values in queries:
+        _answer(number, lambda: help_to_dict(board, parse_edges(values), top, results[number]))
+    return len(queries)
+
+
+def _replay(board: Board, values: List[str]) -> Dict:
+    """Apply a journal entry."""
+    if values[0] == PLACEMENT:
+        return {"placed": tile_to_dict(board.place_tile(parse_tile(values[1:]), show=False))}
+    if values[0] == UNDO:
+        last_placement = tile_to_dict(board.last_placement) if board.last_placement else None
+        board.undo(show=False)
+        return {"undone": last_placement}
+    raise Exception(f"Unknown entry {values[0]}")
+
+
+def main(argv: Optional[List[str]] = None, start: Optional[float] = None) -> int:
+    """Run a command.
+
+    :param argv: arguments, the command line ones by default.
+    :param start: time the process started at, to measure the startup.
+    :return: exit code.
+    """
+    start = time.perf_counter() if start is None else start
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data", help="data file, DATA.csv next to the script by default")
+    common.add_argument("--input", "-i", type=argparse.FileType('r'), default=sys.stdin,
+                        help="queries file, the standard input by default")
+    common.add_argument("--quiet", "-q", action="store_true", help="no logs")
+    common.add_argument("--timing", action="store_true", help="log the startup time")
+    common.add_argument("--profile", action="store_true",
+                        help="time the board operations, then log them and write profile.json next to the data file")
+
+    parser = argparse.ArgumentParser(prog="dorfro_solver.py", description=__doc__.split("\n\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("help", parents=[common], help="best placements of each tile: 6 edges")
+    command.add_argument("--top", type=int, default=TOP_MATCHES, help="number of matches written")
+    command.add_argument("--batch", action="store_true",
+                         help="read all the tiles before answering, to search them together: faster for many tiles")
+    commands.add_parser("place", parents=[common], help="place each tile: x, y and 6 edges")
+    commands.add_parser("find-tile", parents=[common], help="tiles equal to each tile on the board: 6 edges")
+    commands.add_parser("find-candidate", parents=[common], help="tiles fitting each slot on the board: 6 edges")
+    command = commands.add_parser("render", parents=[common], help="draw the board, no query read")
+    command.add_argument("--fast", action="store_true", help="closed tiles drawn as gray hexagons")
+    commands.add_parser("replay", parents=[common], help="apply journal entries: P;x;y;6 edges or U")
+    command = commands.add_parser("serve", parents=[common], help="keep the board in memory behind a local server")
+    command.add_argument("--port", type=int, default=8765, help="port listened to on 127.0.0.1")
+    args = parser.parse_args(argv)
+
+    log = (lambda _: None) if args.quiet else logger.info
+    imported = time.perf_counter()
+    board = Board(log, data_file=args.data, profile=args.profile)
+    loaded = time.perf_counter()
+    if args.timing:
+        log(f"Startup: {(loaded - start):.3f}s (imports {(imported - start):.3f}s, board {(loaded - imported):.3f}s)")
+
+    if args.command == "serve":
+        import server
+        server.serve(board, args.port, log)
+    elif args.command == "render":
+        _answer(0, lambda: {"image": os.path.abspath(board.render(fast_mode=args.fast))})
+    elif args.command == "help" and args.batch:
+        nb_queries = _help_batch(board, _queries(args.input), args.top)
+        if args.timing:
+            log(f"{nb_queries} queries answered in {(time.perf_counter() - loaded):.3f}s")
+    else:
+        nb_queries = 0
+        for number, values in _queries(args.input):
+            if args.command == "help":
+                _answer(number, lambda: help_to_dict(board, parse_edges(values), args.top))
+            elif args.command == "place":
+                _answer(number, lambda: {"placed": tile_to_dict(board.place_tile(parse_tile(values)))})
+            elif args.command == "find-tile":
+                _answer(number, lambda: {"tiles": board.find_tile(parse_edges(values))})
+            elif args.command == "find-candidate":
+                _answer(number, lambda: {"candidates": board.find_candidate(parse_edges(values))})
+            elif args.command == "replay":
+                _answer(number, lambda: _replay(board, values))
+            nb_queries += 1
+        if args.timing:
+            log(f"{nb_queries} queries answered in {(time.perf_counter() - loaded):.3f}s")
+
+    if args.profile:
+        board.report_profile()
+    return 0
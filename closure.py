@@ -0,0 +1,107 @@
+"""Closure probability of the slots, from the distribution of the tiles placed."""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tile import Tile
+
+_SHIFTS = 4 * ((np.arange(6)[:, None] + np.arange(6)[None, :]) % 6)  # [rotation, side]
+
+
+class ClosureModel:
+    """Probability that the next tile fits a slot.
+
+    The next tile is assumed drawn like the tiles already placed: the probability is the share of the tiles placed
+    that fit the edges facing the slot, in any rotation. It is computed once per constraint signature (canonical form
+    of the edges facing the slot) over the distinct tiles placed weighted by their occurrences, then the number of
+    fitting tiles of each signature met is kept up to date as tiles are placed or removed. Probabilities can be asked
+    from several threads at once.
+    """
+
+    def __init__(self, edge_match: List[List[bool]]):
+        """
+        :param edge_match: edge match table, indexed by [candidate edge][neighbor edge].
+        """
+        self._match = np.array(edge_match, dtype=bool)
+        self._counts: Dict[int, int] = {}  # canonical code -> number of tiles placed
+        self._nb_tiles = 0
+        # Distinct tiles placed in every rotation (U, 6, 6) and their occurrences (U,), None once they changed
+        self._tiles: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._rows: Dict[int, int] = {}  # signature -> row of the arrays below
+        self._constraints = np.zeros((64, 6), dtype=np.intp)  # edges facing the slot of each signature
+        self._fits = np.zeros(64, dtype=np.int64)  # number of tiles placed fitting each signature
+        self._lock = threading.Lock()
+
+    def add(self, tile: Tile) -> None:
+        """Count a tile placed.
+
+        :param tile: full tile.
+        """
+        key = Tile.canonical(tile.code)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._nb_tiles += 1
+            self._tiles = None
+            if self._rows:
+                self._fits[:len(self._rows)] += self._fit(_unpack(tile.code), self._constraints[:len(self._rows)])
+
+    def remove(self, tile: Tile) -> None:
+        """Uncount a tile removed.
+
+        :param tile: full tile.
+        """
+        key = Tile.canonical(tile.code)
+        with self._lock:
+            self._counts[key] -= 1
+            if not self._counts[key]:
+                del self._counts[key]
+            self._nb_tiles -= 1
+            self._tiles = None
+            if self._rows:
+                self._fits[:len(self._rows)] -= self._fit(_unpack(tile.code), self._constraints[:len(self._rows)])
+
+    def probability(self, edges: List[Tile.Edge]) -> float:
+        """Probability that the next tile fits a slot.
+
+        :param edges: edges facing each side of the slot, EMPTY where there is no full neighbor.
+        :return: probability, 1 if no tile was placed yet.
+        """
+        key = Tile.canonical(Tile.pack(edges))
+        with self._lock:
+            if not self._nb_tiles:
+                return 1.0
+            if key not in self._rows:
+                self._add_signature(key)
+            return float(self._fits[self._rows[key]] / self._nb_tiles)
+
+    def _add_signature(self, key: int) -> None:
+        """Count the tiles placed fitting a new signature, over the distinct tiles placed."""
+        if self._tiles is None:
+            codes = np.fromiter(self._counts.keys(), dtype=np.int64, count=len(self._counts))
+            occurrences = np.fromiter(self._counts.values(), dtype=np.int64, count=len(self._counts))
+            self._tiles = _unpack(codes), occurrences
+        row = len(self._rows)
+        if row == len(self._fits):
+            self._constraints = np.concatenate([self._constraints, np.zeros_like(self._constraints)])
+            self._fits = np.concatenate([self._fits, np.zeros_like(self._fits)])
+        rotations, occurrences = self._tiles
+        self._constraints[row] = Tile.unpack(key)
+        self._fits[row] = occurrences[self._fit(rotations, self._constraints[row:row + 1])[:, 0]].sum()
+        self._rows[key] = row
+
+    def _fit(self, rotations: np.ndarray, constraints: np.ndarray) -> np.ndarray:
+        """Whether tiles fit constraints in one of their rotations.
+
+        :param rotations: edges of each rotation of the tiles, (U, 6, 6) or (6, 6) for a single tile.
+        :param constraints: edges facing each slot, EMPTY where there is no full neighbor, (K, 6).
+        :return: (U, K) booleans, or (K,) for a single tile.
+        """
+        neighbors = constraints[:, None, :]  # (K, 1, 6)
+        fits = (self._match[rotations[..., None, :, :], neighbors] | (neighbors == Tile.Edge.EMPTY))
+        return fits.all(axis=-1).any(axis=-1)
+
+
+def _unpack(codes) -> np.ndarray:
+    """Edges of every rotation of packed tiles, (..., 6 rotations, 6 sides)."""
+    return ((np.asarray(codes, dtype=np.int64)[..., None, None] >> _SHIFTS) & 0xF).astype(np.intp)
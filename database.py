@@ -1,5 +1,5 @@
 """Database."""
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 
 from tile import Tile
 
@@ -17,7 +17,8 @@ class Database:
     """Contains all the tiles."""
 
     def __init__(self):
-        self._tiles: List[Tile] = [Tile(0, 0)]
+        # Tiles indexed by axial coordinates, kept in insertion order
+        self._tiles: Dict[Tuple[int, int], Tile] = {(0, 0): Tile(0, 0)}
 
     def add_tile(self, tile: Tile) -> None:
         """Add a tile to the database.
@@ -25,32 +26,33 @@ class Database:
         :param tile: tile to add.
         :raise Exception: tile already created.
         """
-        for db_tile in self._tiles:
-            if tile.get_pos() == db_tile.get_pos():
-                raise Exception(f"Cannot add tile {tile.get_pos()}: slot already created.")
+        if tile.get_pos() in self._tiles:
+            raise Exception(f"Cannot add tile {tile.get_pos()}: slot already created.")
 
         # Update neighbors
         for i in range(6):
-            neighbor = self.get_tile(tile.x + NEIGHBORS_COORD[i]["x"], tile.y + NEIGHBORS_COORD[i]["y"])
+            neighbor = self._tiles.get((tile.x + NEIGHBORS_COORD[i]["x"], tile.y + NEIGHBORS_COORD[i]["y"]))
             if neighbor:
-                setattr(neighbor, "n" + str((i + 3) % 6), tile)
-                setattr(tile, "n" + str(i), neighbor)
+                neighbor.set_neighbor((i + 3) % 6, tile)
+                tile.set_neighbor(i, neighbor)
             del neighbor
 
-        self._tiles += [tile]
+        self._tiles[tile.get_pos()] = tile
 
     def remove_tile(self, x: int, y: int) -> None:
-        """Remove a tile from database, if present.
+        """Remove a tile from database, if present, and unlink it from its neighbors.
 
         :param x: x coordinate.
         :param y: y coordinate
         :raise Exception: tile not found.
         """
-        for db_tile in self._tiles:
-            if db_tile.get_pos() == (x, y):
-                self._tiles.remove(db_tile)
-                return
-        raise Exception(f"Tile {x, y} not found")
+        tile = self._tiles.pop((x, y), None)
+        if tile is None:
+            raise Exception(f"Tile {x, y} not found")
+        for i, neighbor in enumerate(tile.neighbors):
+            if neighbor:
+                neighbor.set_neighbor((i + 3) % 6, None)
+                tile.set_neighbor(i, None)
 
     def get_tile(self, x: int, y: int) -> Optional[Tile]:
         """Retrieve a tile by its coordinates.
@@ -59,14 +61,14 @@ class Database:
         :param y: y coordinate.
         :return: tile if found, None otherwise.
         """
-        for db_tile in self._tiles:
-            if x == db_tile.x and y == db_tile.y:
-                return db_tile
-        return None
+        return self._tiles.get((x, y))
 
     def get_tiles(self) -> List[Tile]:
-        """Return all the tiles of the database.
+        """Return all the tiles of the database, in insertion order.
 
         :return: all the tiles.
         """
-        return self._tiles
+        return list(self._tiles.values())
+
+    def __len__(self) -> int:
+        return len(self._tiles)
@@ -1,20 +1,27 @@
 """Main file."""
-import logging.config
-import os
-import sys
+import time
 
-from PyQt5.QtWidgets import QApplication
+START = time.perf_counter()  # before the imports, to measure the startup
 
-from window import MainWidget
+import logging.config  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
 
 logging.config.fileConfig(os.path.join(os.path.dirname(os.path.abspath(__file__)), "logging.conf"))
 
 
 def main():
-    """Main function."""
+    """Main function: the window, or the command line interface if a command is given."""
+    if len(sys.argv) > 1:
+        import cli
+        sys.exit(cli.main(start=START))
+
+    from PyQt5.QtWidgets import QApplication
+    from window import MainWidget
+
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
-    win = MainWidget()
+    win = MainWidget(start=START)
     win.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,172 @@
+"""Connected features of the board (forests, fields, rivers, rails...)."""
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from tile import Tile
+
+FEATURES = (Tile.Edge.PLAIN, Tile.Edge.TREE, Tile.Edge.WEED, Tile.Edge.HOUSE, Tile.Edge.RIVER, Tile.Edge.RAIL)
+
+
+class Group(NamedTuple):
+    """Connected feature: number of tiles and number of edges facing a slot not filled yet."""
+    feature: Tile.Edge
+    size: int
+    open_ends: int
+
+
+class Evaluation(NamedTuple):
+    """Effect of a placement on the groups."""
+    merges: int  # groups joined together
+    closures: int  # groups of at least 2 tiles left with no open end
+    largest: int  # size of the largest group the tile belongs to
+
+
+class FeatureGroups:
+    """Union-find of the features of the full tiles, the edges of a tile with the same feature being connected.
+
+    Union by size without path compression, so that each placement can be rolled back, in reverse order: find is
+    O(log n), a placement O(log n).
+    """
+
+    def __init__(self):
+        self._nodes: Dict[Tuple[int, int], Dict[Tile.Edge, int]] = {}  # group node of each feature of each tile
+        self._parent: List[int] = []
+        self._feature: List[Tile.Edge] = []
+        self._size: List[int] = []  # tiles of the group, at its root
+        self._open: List[int] = []  # open ends of the group, at its root
+        self._log: List[tuple] = []  # changes made, to roll back
+        self._frames: List[int] = []  # length of the log before each placement
+
+    def add(self, tile: Tile) -> List[Group]:
+        """Add a tile placed, joining its features to the ones of its full neighbors.
+
+        :param tile: full tile, linked to its neighbors.
+        :return: groups closed by the placement.
+        """
+        self._frames.append(len(self._log))
+        nodes: Dict[Tile.Edge, int] = {}
+        for edge in tile.get_edges():
+            if edge not in FEATURES:
+                continue
+            if edge not in nodes:
+                nodes[edge] = len(self._parent)
+                self._parent.append(nodes[edge])
+                self._feature.append(edge)
+                self._size.append(1)
+                self._open.append(0)
+            self._open[nodes[edge]] += 1
+        self._nodes[tile.get_pos()] = nodes
+        self._log.append(('tile', tile.get_pos(), len(nodes)))
+
+        touched: Set[int] = set(nodes.values())
+        for i, n in enumerate(tile.neighbors):
+            if n is None or n.state != Tile.State.FULL:
+                continue
+            edge, n_edge = tile.edge(i), n.edge((i + 3) % 6)
+            node, n_node = nodes.get(edge), self._nodes[n.get_pos()].get(n_edge)
+            if node is not None:
+                self._add_open(self._find(node), -1)
+            if n_node is not None:
+                self._add_open(self._find(n_node), -1)
+                touched.add(n_node)
+            if node is not None and n_node is not None and edge == n_edge:
+                self._union(node, n_node)
+        return [group for group in {self._find(node): self._group(self._find(node)) for node in touched}.values()
+                if group.size > 1 and not group.open_ends]
+
+    def undo(self) -> None:
+        """Roll back the last placement added."""
+        start = self._frames.pop()
+        while len(self._log) > start:
+            record = self._log.pop()
+            if record[0] == 'open':
+                _, root, delta = record
+                self._open[root] -= delta
+            elif record[0] == 'union':
+                _, child, root = record
+                self._parent[child] = child
+                self._size[root] -= self._size[child]
+                self._open[root] -= self._open[child]
+            else:
+                _, pos, nb_nodes = record
+                del self._nodes[pos]
+                del self._parent[len(self._parent) - nb_nodes:]
+                del self._feature[len(self._feature) - nb_nodes:]
+                del self._size[len(self._size) - nb_nodes:]
+                del self._open[len(self._open) - nb_nodes:]
+
+    def commit(self) -> None:
+        """Forget how to roll back the placements added so far."""
+        self._log.clear()
+        self._frames.clear()
+
+    def get_group(self, x: int, y: int, feature: Tile.Edge) -> Optional[Group]:
+        """Retrieve the group of a feature of a tile.
+
+        :param x: x coordinate.
+        :param y: y coordinate.
+        :param feature: feature on one of the edges of the tile.
+        :return: group, None if the tile is not full or has no such feature.
+        """
+        node = self._nodes.get((x, y), {}).get(feature)
+        return None if node is None else self._group(self._find(node))
+
+    def evaluate(self, candidate: Tile, slot: Tile) -> Evaluation:
+        """Evaluate a placement without making it.
+
+        :param candidate: tile to place.
+        :param slot: empty slot the tile would be placed on.
+        :return: merges, closures and largest group.
+        """
+        joined: Dict[Tile.Edge, Set[int]] = {}  # groups joined, by feature
+        faced: Dict[int, int] = {}  # edges of each group facing the slot
+        open_ends: Dict[Tile.Edge, int] = {}  # edges of the candidate facing slots not filled yet, by feature
+        for i, n in enumerate(slot.neighbors):
+            edge = candidate.edge(i)
+            if n is None or n.state != Tile.State.FULL:
+                if edge in FEATURES:
+                    open_ends[edge] = open_ends.get(edge, 0) + 1
+                continue
+            n_edge = n.edge((i + 3) % 6)
+            n_node = self._nodes[n.get_pos()].get(n_edge)
+            if n_node is None:
+                continue
+            root = self._find(n_node)
+            faced[root] = faced.get(root, 0) + 1
+            if edge == n_edge:
+                joined.setdefault(edge, set()).add(root)
+
+        merges, closures, largest = 0, 0, 0
+        for feature in {edge for edge in candidate.get_edges() if edge in FEATURES}:
+            roots = joined.get(feature, set())
+            merges += max(len(roots) - 1, 0)
+            size = 1 + sum(self._size[root] for root in roots)
+            if roots and not open_ends.get(feature, 0) + sum(self._open[root] - faced[root] for root in roots):
+                closures += 1
+            largest = max(largest, size)
+        all_joined = set().union(*joined.values())
+        closures += sum(1 for root, count in faced.items()
+                        if root not in all_joined and self._size[root] > 1 and self._open[root] == count)
+        return Evaluation(merges, closures, largest)
+
+    def _find(self, node: int) -> int:
+        while self._parent[node] != node:
+            node = self._parent[node]
+        return node
+
+    def _union(self, a: int, b: int) -> None:
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        if self._size[a] < self._size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        self._size[a] += self._size[b]
+        self._open[a] += self._open[b]
+        self._log.append(('union', b, a))
+
+    def _add_open(self, root: int, delta: int) -> None:
+        self._open[root] += delta
+        self._log.append(('open', root, delta))
+
+    def _group(self, root: int) -> Group:
+        return Group(self._feature[root], self._size[root], self._open[root])
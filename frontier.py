@@ -0,0 +1,166 @@
+"""Frontier of the board."""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from postings import PostingIndex
+from tile import Tile
+
+
+class Frontier:
+    """Empty slots of the board and their number of full neighbors.
+
+    The edges facing each slot are kept in an (N, 6) array, one row per slot, for vectorized evaluations, and posted
+    by side and edge, to find the slots a tile fits without scanning them all.
+    """
+
+    def __init__(self):
+        self._rows: Dict[Tuple[int, int], int] = {}
+        self._slots: List[Tile] = []
+        self._edges: np.ndarray = np.zeros((64, 6), dtype=np.uint8)
+        self._counts: List[int] = []
+        self._postings = PostingIndex()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, slot: Tile) -> None:
+        """Add an empty slot to the frontier.
+
+        :param slot: empty slot.
+        :raise Exception: slot already in the frontier.
+        """
+        if slot.get_pos() in self._rows:
+            raise Exception(f"Slot {slot.get_pos()} already in the frontier")
+        row = len(self._slots)
+        if row == len(self._edges):
+            self._edges = np.concatenate([self._edges, np.zeros_like(self._edges)])
+        self._rows[slot.get_pos()] = row
+        self._slots.append(slot)
+        self._counts.append(0)
+        self.update(slot)
+
+    def load(self, slots: List[Tile], edges: np.ndarray) -> None:
+        """Replace the content of the frontier with precomputed slots.
+
+        :param slots: empty slots.
+        :param edges: edges facing each slot, (N, 6).
+        """
+        self._slots = list(slots)
+        self._rows = {slot.get_pos(): row for row, slot in enumerate(self._slots)}
+        self._edges = np.zeros((max(64, 2 * len(self._slots)), 6), dtype=np.uint8)
+        self._edges[:len(self._slots)] = edges
+        self._counts = np.count_nonzero(self._edges[:len(self._slots)], axis=1).tolist()
+        self._postings.clear()
+        for row, row_edges in enumerate(self._edges[:len(self._slots)].tolist()):
+            self._postings.add(row, row_edges)
+
+    def remove(self, slot: Tile) -> None:
+        """Remove a slot from the frontier, if present. The last row takes its place.
+
+        :param slot: empty slot.
+        """
+        row = self._rows.pop(slot.get_pos(), None)
+        if row is None:
+            return
+        self._postings.remove(row, self._edges[row].tolist())
+        last, count = self._slots.pop(), self._counts.pop()
+        if row != len(self._slots):
+            self._slots[row], self._counts[row] = last, count
+            self._rows[last.get_pos()] = row
+            last_edges = self._edges[len(self._slots)].tolist()
+            self._postings.remove(len(self._slots), last_edges)
+            self._postings.add(row, last_edges)
+            self._edges[row] = last_edges
+
+    def update(self, slot: Tile) -> None:
+        """Refresh the edges facing a slot after one of its neighbors got filled or emptied.
+
+        :param slot: empty slot.
+        """
+        row = self._rows[slot.get_pos()]
+        edges = [n.edge((j + 3) % 6) if n is not None and n.state == Tile.State.FULL else Tile.Edge.EMPTY
+                 for j, n in enumerate(slot.neighbors)]
+        self._postings.remove(row, self._edges[row].tolist())
+        self._postings.add(row, edges)
+        self._edges[row] = edges
+        self._counts[row] = 6 - edges.count(Tile.Edge.EMPTY)
+
+    def set_edge(self, slot: Tile, side: int, edge: Tile.Edge) -> None:
+        """Set the edge facing a side of a slot after the neighbor of that side got filled or emptied.
+
+        :param slot: empty slot.
+        :param side: side index of the slot.
+        :param edge: edge of the neighbor facing the slot, EMPTY if the neighbor was emptied.
+        """
+        row = self._rows[slot.get_pos()]
+        old = self._edges.item(row, side)
+        self._postings.set_edge(row, side, old, edge)
+        self._edges[row, side] = edge
+        self._counts[row] += (edge != Tile.Edge.EMPTY) - (old != Tile.Edge.EMPTY)
+
+    def count(self, slot: Tile) -> int:
+        """Number of full neighbors of a slot.
+
+        :param slot: empty slot.
+        :return: number of full neighbors.
+        """
+        return self._counts[self._rows[slot.get_pos()]]
+
+    def get_edges(self, slot: Tile) -> List[Tile.Edge]:
+        """Edges facing each side of a slot, EMPTY where there is no full neighbor.
+
+        :param slot: empty slot.
+        :return: 6 edges.
+        """
+        return [Tile.Edge(e) for e in self._edges[self._rows[slot.get_pos()]].tolist()]
+
+    def get_slot(self, row: int) -> Tile:
+        """Retrieve the slot of a row.
+
+        :param row: row of the arrays.
+        :return: empty slot.
+        """
+        return self._slots[row]
+
+    def find_rows(self, rotations: List[List[Tile.Edge]], matching: List[List[Tile.Edge]],
+                  min_neighbors: int) -> np.ndarray:
+        """Rows of the slots having at least the given number of full neighbors that a tile may fit, see
+        PostingIndex.find. All of them when scanning is cheaper than looking them up.
+
+        :param rotations: edges of each rotation of the tile.
+        :param matching: full edges matched by each edge.
+        :param min_neighbors: minimal number of full neighbors.
+        :return: sorted rows.
+        """
+        rows: Optional[np.ndarray] = self._postings.find(rotations, matching, self._counts, min_neighbors)
+        if rows is None:
+            return np.flatnonzero(np.array(self._counts, dtype=np.intp) >= min_neighbors)
+        return rows
+
+    def get_patterns(self, min_neighbors: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Distinct edges facing the slots having at least the given number of full neighbors: a tile fits all the
+        slots of a pattern the same way, so it is scored once for them.
+
+        :param min_neighbors: minimal number of full neighbors.
+        :return: (U, 6) patterns, rows of the slots grouped by pattern and sorted, (U + 1,) start of the rows of each
+            pattern.
+        """
+        edges, counts = self.get_arrays()
+        rows = np.flatnonzero(counts >= min_neighbors)
+        patterns, inverse = np.unique(edges[rows], axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        offsets = np.zeros(len(patterns) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(inverse, minlength=len(patterns)), out=offsets[1:])
+        return patterns, rows[np.argsort(inverse, kind='stable')], offsets
+
+    def get_arrays(self, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Edges facing each slot (EMPTY where there is no full neighbor) and number of full neighbors.
+
+        :param rows: rows wanted, all of them by default.
+        :return: (N, 6) edges array, a view valid until the next update for all the rows, and (N,) counts array.
+        """
+        counts = np.array(self._counts, dtype=np.intp)
+        if rows is None:
+            return self._edges[:len(self._slots)], counts
+        return self._edges[rows], counts[rows]
@@ -0,0 +1,62 @@
+"""Synthetic boards, to measure the board against its size."""
+import random
+from typing import Dict, List, Tuple
+
+from board import EDGE_MATCHING
+from database import NEIGHBORS_COORD
+from tile import Tile
+
+# Share of each edge on a side facing no tile yet, close to the ones of a real board
+EDGE_WEIGHTS: Dict[Tile.Edge, int] = {
+    Tile.Edge.PLAIN: 35, Tile.Edge.TREE: 17, Tile.Edge.WEED: 15, Tile.Edge.HOUSE: 16,
+    Tile.Edge.RIVER: 5, Tile.Edge.RAIL: 4, Tile.Edge.POND: 5, Tile.Edge.DOME: 3,
+}
+SAME_EDGE_RATE = 0.8  # chance that a side facing a tile copies its edge, any other matching edge being drawn otherwise
+
+
+def generate(nb_tiles: int, seed: int = 0) -> List[Tile]:
+    """Grow a board with no conflict: each tile is placed on a random empty slot next to the tiles placed, its edges
+    matching the ones of its neighbors.
+
+    :param nb_tiles: number of tiles.
+    :param seed: random seed, the same board being generated for the same seed.
+    :return: tiles in the order they are placed, starting at (0, 0).
+    """
+    rnd = random.Random(seed)
+    edges_by_pos: Dict[Tuple[int, int], List[Tile.Edge]] = {}
+    slots: List[Tuple[int, int]] = [(0, 0)]
+    known_slots = {(0, 0)}
+    free_edges, weights = list(EDGE_WEIGHTS), list(EDGE_WEIGHTS.values())
+    tiles = []
+    while len(tiles) < nb_tiles:
+        # Pick a random slot, swapping it with the last one to pop it in O(1)
+        k = rnd.randrange(len(slots))
+        slots[k], slots[-1] = slots[-1], slots[k]
+        x, y = slots.pop()
+
+        edges = []
+        for i in range(6):
+            pos = x + NEIGHBORS_COORD[i]["x"], y + NEIGHBORS_COORD[i]["y"]
+            neighbor = edges_by_pos.get(pos)
+            if neighbor is None:
+                edges.append(rnd.choices(free_edges, weights)[0])
+                if pos not in known_slots:
+                    known_slots.add(pos)
+                    slots.append(pos)
+            else:
+                facing = neighbor[(i + 3) % 6]
+                edges.append(facing if rnd.random() < SAME_EDGE_RATE else rnd.choice(EDGE_MATCHING[facing]))
+        edges_by_pos[x, y] = edges
+        tiles.append(Tile(x, y, edges=edges))
+    return tiles
+
+
+def write_data_file(path: str, tiles: List[Tile]) -> None:
+    """Write tiles in the data file format.
+
+    :param path: data file to create.
+    :param tiles: tiles, each one next to a previous one.
+    """
+    with open(path, 'w') as file:
+        for tile in tiles:
+            file.write(";".join(str(int(n)) for n in [tile.x, tile.y, *tile.get_edges()]) + "\n")
@@ -0,0 +1,151 @@
+"""Dense grid of the board, for the whole board queries."""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from database import NEIGHBORS_COORD
+from tile import Tile
+
+NONE, SLOT, FULL = 0, 1, 2  # kinds of cell
+INITIAL_SIZE = 64
+
+
+class Grid:
+    """Packed edges and kind of each cell in arrays indexed by axial offset from a moving origin.
+
+    Neighbors are not stored: the neighbors of every cell are the arrays shifted by NEIGHBORS_COORD. The arrays double
+    along an axis when a cell falls outside, so growing the board costs O(1) amortized per cell.
+    """
+
+    def __init__(self, size: int = INITIAL_SIZE):
+        """
+        :param size: initial width and height of the arrays.
+        """
+        self._x0, self._y0 = -(size // 2), -(size // 2)  # coordinates of the cell [0, 0]
+        self._kinds = np.zeros((size, size), dtype=np.uint8)
+        self._codes = np.zeros((size, size), dtype=np.uint32)
+        self._box: Optional[List[int]] = None  # x min, x max, y min, y max of the cells ever used
+
+    def set(self, x: int, y: int, kind: int, code: int = 0) -> None:
+        """Set a cell.
+
+        :param x: x coordinate.
+        :param y: y coordinate.
+        :param kind: NONE, SLOT or FULL.
+        :param code: packed edges of a full tile.
+        """
+        box = self._box
+        if box is None or not (box[0] <= x <= box[1] and box[2] <= y <= box[3]):
+            self._reserve(x, x, y, y)
+        self._kinds[x - self._x0, y - self._y0] = kind
+        self._codes[x - self._x0, y - self._y0] = code
+
+    def set_many(self, xs: np.ndarray, ys: np.ndarray, kind: int, codes: Optional[np.ndarray] = None) -> None:
+        """Set cells at once.
+
+        :param xs: x coordinates.
+        :param ys: y coordinates.
+        :param kind: NONE, SLOT or FULL.
+        :param codes: packed edges of the full tiles.
+        """
+        if not len(xs):
+            return
+        xs, ys = np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64)
+        self._reserve(int(xs.min()), int(xs.max()), int(ys.min()), int(ys.max()))
+        self._kinds[xs - self._x0, ys - self._y0] = kind
+        self._codes[xs - self._x0, ys - self._y0] = 0 if codes is None else codes
+
+    def get_positions(self, kind: Optional[int] = None) -> np.ndarray:
+        """Coordinates of the cells of a kind.
+
+        :param kind: SLOT or FULL, both by default.
+        :return: (N, 2) coordinates, sorted by x then y.
+        """
+        kinds, x0, y0 = self._view()
+        return np.argwhere(kinds != NONE if kind is None else kinds == kind) + (x0, y0)
+
+    def get_frontier(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Slots and the edges facing them.
+
+        :return: (N, 2) coordinates sorted by x then y, (N, 6) edges facing each side, EMPTY where there is no full
+            neighbor.
+        """
+        kinds, x0, y0 = self._view()
+        codes = self._view(self._codes)[0]
+        mask = kinds == SLOT
+        edges = np.zeros((int(mask.sum()), 6), dtype=np.uint8)
+        for i in range(6):
+            full = _shift(kinds, i) == FULL
+            edges[:, i] = np.where(full, (_shift(codes, i) >> (4 * ((i + 3) % 6))) & 0xF, Tile.Edge.EMPTY)[mask]
+        return np.argwhere(mask) + (x0, y0), edges
+
+    def get_closed(self, kind: int) -> np.ndarray:
+        """Cells of a kind whose 6 neighbors are full: slots only one tile fits, or tiles surrounded.
+
+        :param kind: SLOT or FULL.
+        :return: (N, 2) coordinates, sorted by x then y.
+        """
+        kinds, x0, y0 = self._view()
+        mask = kinds == kind
+        for i in range(6):
+            mask &= _shift(kinds, i) == FULL
+        return np.argwhere(mask) + (x0, y0)
+
+    def get_center(self) -> Optional[Tuple[float, float]]:
+        """Mean coordinates of the full tiles, None if there is none."""
+        positions = self.get_positions(FULL)
+        if not len(positions):
+            return None
+        return float(positions[:, 0].mean()), float(positions[:, 1].mean())
+
+    def _view(self, array: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int, int]:
+        """Part of an array holding the cells ever used, and the coordinates of its first cell."""
+        array = self._kinds if array is None else array
+        if self._box is None:
+            return array[:0, :0], self._x0, self._y0
+        x_min, x_max, y_min, y_max = self._box
+        return array[x_min - self._x0:x_max - self._x0 + 1, y_min - self._y0:y_max - self._y0 + 1], x_min, y_min
+
+    def _reserve(self, x_min: int, x_max: int, y_min: int, y_max: int) -> None:
+        """Grow the arrays to hold the given box, doubling their size along the axis too small."""
+        if self._box is not None:
+            self._box = [min(self._box[0], x_min), max(self._box[1], x_max),
+                         min(self._box[2], y_min), max(self._box[3], y_max)]
+        else:
+            self._box = [x_min, x_max, y_min, y_max]
+
+        width, height = self._kinds.shape
+        x0, y0 = self._x0, self._y0
+        if self._box[0] >= x0 and self._box[1] < x0 + width and self._box[2] >= y0 and self._box[3] < y0 + height:
+            return
+        new_x0, new_width = _grow(x0, width, self._box[0], self._box[1])
+        new_y0, new_height = _grow(y0, height, self._box[2], self._box[3])
+        for name in ['_kinds', '_codes']:
+            old = getattr(self, name)
+            new = np.zeros((new_width, new_height), dtype=old.dtype)
+            new[x0 - new_x0:x0 - new_x0 + width, y0 - new_y0:y0 - new_y0 + height] = old
+            setattr(self, name, new)
+        self._x0, self._y0 = new_x0, new_y0
+
+
+def _grow(origin: int, size: int, low: int, high: int) -> Tuple[int, int]:
+    """Origin and size of an axis holding the current one and [low, high], the size doubled until large enough."""
+    low, high = min(low, origin), max(high, origin + size - 1)
+    if origin <= low and high < origin + size:
+        return origin, size
+    new_size = size
+    while new_size < high - low + 1:
+        new_size *= 2
+    if new_size == size:
+        new_size *= 2
+    return low - (new_size - (high - low + 1)) // 2, new_size
+
+
+def _shift(array: np.ndarray, i: int) -> np.ndarray:
+    """Array of the neighbors of each cell on a side: [x, y] holds array[x + dx, y + dy], 0 outside."""
+    dx, dy = NEIGHBORS_COORD[i]["x"], NEIGHBORS_COORD[i]["y"]
+    width, height = array.shape
+    shifted = np.zeros_like(array)
+    shifted[max(-dx, 0):width - max(dx, 0), max(-dy, 0):height - max(dy, 0)] = \
+        array[max(dx, 0):width + min(dx, 0), max(dy, 0):height + min(dy, 0)]
+    return shifted
@@ -0,0 +1,125 @@
+"""Append-only journal of the placements, saved next to the data file."""
+import os
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+from tile import Tile
+
+JOURNAL_EXTENSION = '.journal'
+BACKUP_EXTENSION = '.bak'  # added to an obsolete journal moved aside
+
+PLACEMENT = 'P'
+UNDO = 'U'
+
+_HEADER = '#data'
+
+
+class Journal:
+    """Placements and undos made since the data file was last written, flushed as they happen.
+
+    The first line stamps the content of the data file the journal applies to, a journal stamped for another version
+    of the data file is obsolete: its entries were already compacted into the data file, unless the data file was
+    replaced, so it is moved aside rather than overwritten.
+    """
+
+    def __init__(self, data_path: str):
+        """
+        :param data_path: data file the journal applies to.
+        """
+        self._data_path = data_path
+        self._path = os.path.splitext(data_path)[0] + JOURNAL_EXTENSION
+        self._file = None
+        self._nb_entries = 0
+        self._stamp: Optional[str] = None  # stamp of the data file, computed once until it is rewritten
+
+    def __len__(self) -> int:
+        return self._nb_entries
+
+    def read(self) -> Iterator[Tuple[str, List[int]]]:
+        """Read the entries of the journal, if it applies to the current data file.
+
+        :return: iterator of (entry type, values), values being x, y and the 6 edges for a placement.
+        """
+        if not os.path.isfile(self._path):
+            return
+        with open(self._path) as file:
+            if file.readline().strip() != self._get_stamp():
+                return
+            for line in file:
+                if not line.endswith('\n'):
+                    return  # entry interrupted by a crash
+                kind, *values = line.strip().split(';')
+                yield kind, [int(n) for n in values]
+
+    def open(self) -> Optional[str]:
+        """Open the journal for appending, starting a new one if missing or obsolete, an obsolete one being moved
+        aside.
+
+        The valid entries are rewritten, dropping an entry interrupted by a crash.
+
+        :return: file the obsolete journal was moved to, None if there was none.
+        """
+        backup = None
+        if os.path.isfile(self._path):
+            with open(self._path) as file:
+                if file.readline().strip() != self._get_stamp():
+                    backup = self._path + BACKUP_EXTENSION
+        if backup:
+            n = 1
+            while os.path.exists(backup):  # earlier ones kept
+                backup, n = f"{self._path}.{n}{BACKUP_EXTENSION}", n + 1
+            os.replace(self._path, backup)
+        self._start([";".join([kind] + [str(n) for n in values]) for kind, values in self.read()])
+        return backup
+
+    def reset(self) -> None:
+        """Start a new empty journal, once the data file was rewritten."""
+        self._stamp = None
+        self._start([])
+
+    def _start(self, lines: List[str]) -> None:
+        """Start a new journal, stamped for the current data file.
+
+        :param lines: entries to start with.
+        """
+        self.close()
+        with open(self._path + '.tmp', 'w') as file:
+            file.write("".join(line + '\n' for line in [self._get_stamp()] + lines))
+        os.replace(self._path + '.tmp', self._path)
+        self._file = open(self._path, 'a')
+        self._nb_entries = len(lines)
+
+    def close(self) -> None:
+        """Close the journal."""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def record_placement(self, tile: Tile) -> None:
+        """Append a placement.
+
+        :param tile: tile placed.
+        """
+        self._write(";".join([PLACEMENT] + [str(n) for n in [tile.x, tile.y] + [int(e) for e in tile.get_edges()]]))
+
+    def record_undo(self) -> None:
+        """Append an undo of the last placement."""
+        self._write(UNDO)
+
+    def _write(self, line: str) -> None:
+        self._file.write(line + '\n')
+        self._file.flush()
+        self._nb_entries += 1
+
+    def _get_stamp(self) -> str:
+        """Stamp of the data file: its size and the CRC32 of its content, whatever its modification time. The data file
+        is read the first time only, and again once reset."""
+        if self._stamp is not None:
+            return self._stamp
+        crc, size = 0, 0
+        with open(self._data_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                crc = zlib.crc32(block, crc)
+                size += len(block)
+        self._stamp = f"{_HEADER};{size};{crc:08x}"
+        return self._stamp
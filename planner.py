@@ -0,0 +1,93 @@
+"""Lookahead search of the placements of the next tiles of the stack."""
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import List, NamedTuple, Optional, Tuple
+
+import snapshot
+from tile import Tile
+
+BEAM_WIDTH = 8
+TIME_BUDGET = 10.0  # seconds
+
+_board = None  # board of a worker process
+
+
+class Plan(NamedTuple):
+    """Sequence of placements, one per tile of the stack, and their total value."""
+    placements: List[Tile]
+    value: int
+
+
+def plan(board, tiles: List[List[Tile.Edge]], beam_width: int = BEAM_WIDTH, time_budget: float = TIME_BUDGET,
+         workers: Optional[int] = None) -> Optional[Plan]:
+    """Beam search over the placements of the tiles, in the order they come.
+
+    The best placements of the first tile are the branches of the search, each one explored in a worker process on a
+    copy of the board. The search stops at the time budget, deeper plans then higher values being preferred.
+
+    :param board: board to place the tiles on.
+    :param tiles: edges of the next tiles.
+    :param beam_width: plans kept at each step, and number of branches.
+    :param time_budget: seconds after which the best plan found so far is returned.
+    :param workers: number of processes, one per core by default.
+    :return: best plan, None if the first tile cannot be placed without conflict.
+    """
+    deadline = time.time() + time_budget
+    if not tiles:
+        return None
+    branches = sorted((Plan([tile], value) for tile, value in board.get_placements(tiles[0])), key=_rank)[:beam_width]
+    if not branches or len(tiles) == 1:
+        return branches[0] if branches else None
+
+    plans = [branches[0]]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(board.get_snapshot(),)) as pool:
+        futures = [pool.submit(_search_branch, branch, tiles[1:], beam_width, deadline) for branch in branches]
+        done, not_done = wait(futures, timeout=max(deadline - time.time(), 0))
+        for future in not_done:
+            future.cancel()  # the ones running stop on their own at the deadline
+        plans += [future.result() for future in done if future.exception() is None]
+    return min(plans, key=_rank)
+
+
+def search(board, plans: List[Plan], tiles: List[List[Tile.Edge]], beam_width: int, deadline: float) -> Plan:
+    """Extend plans tile after tile, keeping the best ones at each step.
+
+    :param board: board the plans start from, left as is.
+    :param plans: plans to extend.
+    :param tiles: edges of the next tiles.
+    :param beam_width: plans kept at each step.
+    :param deadline: time at which the best plan of the last step completed is returned.
+    :return: best plan.
+    """
+    beam = sorted(plans, key=_rank)[:beam_width]
+    for edges in tiles:
+        children: List[Plan] = []
+        for parent in beam:
+            if time.time() > deadline:
+                return beam[0]
+            with board.transaction():
+                for tile in parent.placements:
+                    board.place_tile(tile, show=False)
+                for tile, value in board.get_placements(edges):
+                    children.append(Plan(parent.placements + [tile], parent.value + value))
+        if not children:
+            break  # the tile cannot be placed without conflict
+        beam = sorted(children, key=_rank)[:beam_width]
+    return beam[0]
+
+
+def _rank(p: Plan) -> Tuple[int, int, List[Tuple[int, int]]]:
+    """Deeper plans first, then higher values, coordinates breaking ties."""
+    return -len(p.placements), -p.value, [tile.get_pos() for tile in p.placements]
+
+
+def _init_worker(data: snapshot.Snapshot) -> None:
+    """Build the board of a worker process."""
+    global _board
+    from board import Board
+    _board = Board(lambda _: None, data=data)
+
+
+def _search_branch(branch: Plan, tiles: List[List[Tile.Edge]], beam_width: int, deadline: float) -> Plan:
+    """Search the plans starting with a placement, in a worker process."""
+    return search(_board, [branch], tiles, beam_width, deadline)
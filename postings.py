@@ -0,0 +1,93 @@
+"""Inverted index of the frontier slots by the edges facing them."""
+from collections import Counter
+from itertools import chain
+from typing import List, Optional, Set
+
+import numpy as np
+
+from tile import Tile
+
+SCAN_COST = 1  # cost of a row scanned for each rotation by the vectorized scoring, against a posting entry counted
+
+
+class PostingIndex:
+    """Rows of the frontier slots, by side and edge of the full neighbor facing that side.
+
+    The slots a tile fits in a rotation are the ones whose every full side faces an edge it matches: they are found by
+    counting, for each slot, the sides posted under an edge matched, without visiting the slots facing none.
+    """
+
+    def __init__(self):
+        self._postings: List[List[Set[int]]] = [[set() for _ in Tile.Edge] for _ in range(6)]
+
+    def add(self, row: int, edges: List[int]) -> None:
+        """Post a row under the edges facing its sides.
+
+        :param row: row of the slot.
+        :param edges: edges facing each side, EMPTY ones not posted.
+        """
+        for side, edge in enumerate(edges):
+            if edge:
+                self._postings[side][edge].add(row)
+
+    def remove(self, row: int, edges: List[int]) -> None:
+        """Remove a row from the postings of the edges facing its sides.
+
+        :param row: row of the slot.
+        :param edges: edges facing each side.
+        """
+        for side, edge in enumerate(edges):
+            if edge:
+                self._postings[side][edge].discard(row)
+
+    def set_edge(self, row: int, side: int, old: int, new: int) -> None:
+        """Move a row to the posting of the new edge facing one of its sides.
+
+        :param row: row of the slot.
+        :param side: side index.
+        :param old: edge facing the side before.
+        :param new: edge facing the side now.
+        """
+        if old:
+            self._postings[side][old].discard(row)
+        if new:
+            self._postings[side][new].add(row)
+
+    def clear(self) -> None:
+        """Remove all the rows."""
+        for postings in self._postings:
+            for posting in postings:
+                posting.clear()
+
+    def get(self, side: int, edge: Tile.Edge) -> Set[int]:
+        """Rows of the slots facing an edge on a side.
+
+        :param side: side index.
+        :param edge: edge facing the side.
+        :return: rows, not to be modified.
+        """
+        return self._postings[side][edge]
+
+    def find(self, rotations: List[List[Tile.Edge]], matching: List[List[Tile.Edge]], n_neighbors: List[int],
+             min_neighbors: int) -> Optional[np.ndarray]:
+        """Rows of the slots a tile fits without conflict in one of its rotations, or closed slots it fits but one side.
+
+        :param rotations: edges of each rotation of the tile.
+        :param matching: full edges matched by each edge.
+        :param n_neighbors: number of full neighbors of each row.
+        :param min_neighbors: minimal number of full neighbors of the slots.
+        :return: sorted rows, None when scanning all the rows is cheaper than counting the postings.
+        """
+        postings = [[self._postings[side][n] for side, edge in enumerate(edges) for n in matching[edge]]
+                    for edges in rotations]
+        cost = sum(len(posting) for rotation in postings for posting in rotation)
+        if cost > SCAN_COST * len(n_neighbors) * len(rotations):
+            return None
+
+        rows: Set[int] = set()
+        for rotation in postings:
+            for row, count in Counter(chain.from_iterable(rotation)).items():
+                n = n_neighbors[row]
+                if n >= min_neighbors and (count == n or (count == 5 and n == 6)):
+                    rows.add(row)
+        return np.array(sorted(rows), dtype=np.intp)
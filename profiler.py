@@ -0,0 +1,139 @@
+"""Opt-in timing of the board operations."""
+import functools
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple
+
+LATENCY_WINDOW = 10000  # latest calls of each operation kept for the percentiles
+
+
+class Stats(NamedTuple):
+    """Calls of an operation, times in milliseconds."""
+    calls: int
+    total_ms: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class Profiler:
+    """Call counts and latencies of operations, and counters of their inner loops.
+
+    Disabled, nothing is wrapped: the methods profiled are only replaced by timed ones on the instance while enabled,
+    the counters being updated behind a single check of enabled. Calls can be recorded from several threads at once.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """
+        :param window: latest calls of each operation kept for the percentiles.
+        """
+        self.enabled = False
+        self._window = window
+        self._calls: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+        self._times: Dict[str, Deque[float]] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, obj: object, names: Iterable[str]) -> None:
+        """Start timing methods of an object.
+
+        :param obj: object profiled.
+        :param names: methods timed, under their name.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        for name in names:
+            setattr(obj, name, self._timed(name, getattr(obj, name)))
+
+    def disable(self, obj: object, names: Iterable[str]) -> None:
+        """Stop timing methods of an object, what was recorded is kept.
+
+        :param obj: object profiled.
+        :param names: methods timed.
+        """
+        self.enabled = False
+        for name in names:
+            obj.__dict__.pop(name, None)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a call.
+
+        :param name: operation.
+        :param seconds: time taken.
+        """
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+            self._times.setdefault(name, deque(maxlen=self._window)).append(seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add to a counter.
+
+        :param name: counter.
+        :param n: amount added.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self) -> None:
+        """Forget what was recorded."""
+        with self._lock:
+            self._calls.clear()
+            self._totals.clear()
+            self._times.clear()
+            self._counters.clear()
+
+    def stats(self) -> Dict[str, Stats]:
+        """Statistics of each operation called."""
+        with self._lock:
+            records = [(name, self._calls[name], self._totals[name], sorted(times))
+                       for name, times in self._times.items()]
+        stats = {}
+        for name, calls, total, ordered in records:
+            stats[name] = Stats(
+                calls, round(1000 * total, 3), round(1000 * total / calls, 3),
+                *[round(1000 * ordered[min(len(ordered) - 1, len(ordered) * p // 100)], 3) for p in (50, 95, 99)],
+                round(1000 * ordered[-1], 3)
+            )
+        return stats
+
+    def counters(self) -> Dict[str, int]:
+        """Counters, by name."""
+        with self._lock:
+            return dict(self._counters)
+
+    def report(self) -> List[str]:
+        """Lines summing up the operations and the counters."""
+        lines = [f"{'operation':<16}{'calls':>8}{'total':>11}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+        for name, s in sorted(self.stats().items(), key=lambda item: -item[1].total_ms):
+            lines.append(f"{name:<16}{s.calls:>8}{s.total_ms:>9.1f}ms{s.mean_ms:>8.2f}ms{s.p50_ms:>8.2f}ms"
+                         f"{s.p95_ms:>8.2f}ms{s.p99_ms:>8.2f}ms{s.max_ms:>8.2f}ms")
+        lines += [f"{name:<32}{value:>12}" for name, value in sorted(self.counters().items())]
+        return lines
+
+    def dump(self, path: str) -> None:
+        """Write the statistics and the counters as JSON.
+
+        :param path: file written.
+        """
+        with open(path, 'w') as file:
+            json.dump({
+                "operations": {name: s._asdict() for name, s in self.stats().items()},
+                "counters": self.counters(),
+            }, file, indent=2)
+
+    def _timed(self, name: str, function: Callable) -> Callable:
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - t0)
+        return timed
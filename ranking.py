@@ -0,0 +1,109 @@
+"""Bounded ranking of the matches of a tile."""
+import heapq
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from board import Match
+
+TOP_MATCHES = 15  # matches kept for each number of neighbors
+
+
+def rank_key(match: 'Match') -> tuple:
+    """Sort key of a match, the best first: value, then groups closed and merged, closure (descending), distance."""
+    return -match.value, -match.closures, -match.merges, -match.closure, match.distance
+
+
+class Ranking:
+    """Best matches of a search, added one by one: the top ones for each number of neighbors in bounded heaps, and
+    the two best ones by value and by number of neighbors, to tell the winners and whether they are tied.
+
+    Matches ranked equal keep the order they were added in, like a stable sort of them all would.
+    """
+
+    def __init__(self, top: int = TOP_MATCHES):
+        """
+        :param top: matches kept for each number of neighbors.
+        """
+        self._top = top
+        self._count = 0
+        self._heaps: Dict[int, List[Tuple[tuple, 'Match']]] = {}  # worst match kept first, keys negated
+        self._best_values: List[Tuple[tuple, 'Match']] = []  # two best matches by key
+        self._best_matches: List[Tuple[tuple, 'Match']] = []  # two best matches by number of neighbors, then key
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, match: 'Match') -> None:
+        """Rank a match.
+
+        :param match: match, see Board.help_me.
+        """
+        key = rank_key(match) + (self._count,)
+        self._count += 1
+        heap = self._heaps.setdefault(match.n_neighbors, [])
+        item = (tuple(-k for k in key), match)
+        if len(heap) < self._top:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+        _keep_two(self._best_values, key, match)
+        _keep_two(self._best_matches, (-match.n_neighbors,) + key, match)
+
+    def may_keep(self, n_neighbors: int, value: float) -> bool:
+        """Whether a match could be kept, from its number of neighbors and value only: not when at least two matches
+        kept with the same number of neighbors have a higher value. A match that cannot is counted with skip.
+
+        :param n_neighbors: number of neighbors of the match.
+        :param value: value of the match.
+        """
+        heap = self._heaps.get(n_neighbors, [])
+        return len(heap) < max(self._top, 2) or value >= heap[0][0][0]
+
+    def skip(self) -> None:
+        """Count a match not ranked as it could not be kept, see may_keep."""
+        self._count += 1
+
+    def get_by_neighbors(self) -> Dict[int, List['Match']]:
+        """Matches kept for each number of neighbors, the best first.
+
+        :return: sorted matches, by number of neighbors in descending order.
+        """
+        return {n: [match for _, match in sorted(self._heaps[n], reverse=True)]
+                for n in sorted(self._heaps, reverse=True)}
+
+    def get_best(self, top: Optional[int] = None) -> List['Match']:
+        """Best matches, whatever their number of neighbors.
+
+        :param top: number of matches, all the ones kept by default (the top for each number of neighbors).
+        :return: sorted matches.
+        """
+        items = sorted((item for heap in self._heaps.values() for item in heap), reverse=True)
+        return [match for _, match in items[:top]]
+
+    @property
+    def best_value(self) -> Optional['Match']:
+        """Best match, None if there is none."""
+        return self._best_values[0][1] if self._best_values else None
+
+    @property
+    def best_value_tied(self) -> bool:
+        """Whether the second best match has the same value as the best one."""
+        return len(self._best_values) == 2 and self._best_values[0][1].value == self._best_values[1][1].value
+
+    @property
+    def best_match(self) -> Optional['Match']:
+        """Best match among the ones with the most neighbors, None if there is none."""
+        return self._best_matches[0][1] if self._best_matches else None
+
+    @property
+    def best_match_tied(self) -> bool:
+        """Whether the next match by number of neighbors has the same value as the best match."""
+        return len(self._best_matches) == 2 and self._best_matches[0][1].value == self._best_matches[1][1].value
+
+
+def _keep_two(best: List[Tuple[tuple, 'Match']], key: tuple, match: 'Match') -> None:
+    """Insert a match in a list of the two lowest keys."""
+    if len(best) < 2 or key < best[1][0]:
+        best.append((key, match))
+        best.sort(key=lambda item: item[0])
+        del best[2:]
@@ -0,0 +1,209 @@
+"""Chunked rendering of the board."""
+import math as m
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
+from PIL import Image
+
+from tile import Tile
+
+CHUNK_SIZE = 8  # side of a chunk, in board units
+PIXELS_PER_UNIT = 100  # resolution of the chunk images, the coordinates being readable
+OVERVIEW_REDUCTION = 5  # the overview of the whole board has a pixel for each square of 5x5 pixels of the chunks
+
+# Hexagon of a tile and its trapezoid for each side, relative to the center of the tile
+_HEXAGON_SIZE = 0.5 / m.cos(m.pi / 6) - 2 * 0.01  # 0.01 is the width of the triangles' lines (probably)
+HEXAGON_OFFSETS: np.ndarray = _HEXAGON_SIZE * np.array([[m.cos(k * m.pi / 3), m.sin(k * m.pi / 3)] for k in range(7)])
+TRAPEZOID_OFFSETS: np.ndarray = np.array([
+    [HEXAGON_OFFSETS[i] / 2, HEXAGON_OFFSETS[i], HEXAGON_OFFSETS[i + 1], HEXAGON_OFFSETS[i + 1] / 2] for i in range(6)
+])
+LABEL_SIZE = 0.12  # height of the coordinates labels, in board units
+
+Chunk = Tuple[int, int]
+
+
+class ChunkRenderer:
+    """Renders the board as square chunks, each one drawn again only once one of the tiles it shows changed.
+
+    A chunk draws every tile whose hexagon overlaps it, clipped to its square. Each chunk is written at full resolution
+    in its own image file, an HTML page laying them side by side, so that the unchanged ones are not encoded again.
+    Only a reduced copy of each chunk is kept in memory, for the overview image of the whole board, and only for the
+    mode rendered last.
+    """
+
+    def __init__(self, get_tile: Callable[[int, int], Optional[Tile]], colors: Dict[Tile.Edge, str],
+                 transform: Callable):
+        """
+        :param get_tile: retrieves a tile by its coordinates.
+        :param colors: color of each edge.
+        :param transform: board coordinates to drawing coordinates.
+        """
+        self._get_tile = get_tile
+        self._colors = colors
+        self._tr = transform
+        self._positions: Dict[Chunk, Set[Tuple[int, int]]] = {}  # tiles overlapping each chunk
+        self._fast_mode: Optional[bool] = None  # mode of the chunks rendered
+        self._overviews: Dict[Chunk, np.ndarray] = {}  # reduced raster of each chunk rendered
+        self._dirty: Set[Chunk] = set()  # chunks to render again
+
+    def update(self, positions: Iterable[Tuple[int, int]]) -> None:
+        """Invalidate the chunks showing the given coordinates, after their tiles got placed, removed or closed.
+
+        :param positions: coordinates of the tiles changed.
+        """
+        for pos in positions:
+            for chunk in self._get_chunks(pos):
+                self._positions.setdefault(chunk, set()).add(pos)
+                self._dirty.add(chunk)
+
+    def render(self, path: str, extent: Tuple[float, float, float, float], closed: Set[Tuple[int, int]],
+               fast_mode: bool = False) -> int:
+        """Draw the board, rendering only the chunks invalidated since the last render in the same mode.
+
+        The overview is written in path, the chunks in a folder next to it (board_chunks/ for board.png) and the page
+        showing them at full resolution in an HTML file (board.html).
+
+        :param path: overview image file.
+        :param extent: x min, x max, y min, y max of the centers of the tiles and the slots, in drawing coordinates.
+        :param closed: coordinates of the tiles surrounded by 6 tiles, drawn as gray hexagons in fast mode.
+        :param fast_mode: closed tiles drawn as gray hexagons, without coordinates.
+        :return: number of chunks rendered.
+        """
+        if fast_mode != self._fast_mode:
+            self._fast_mode = fast_mode
+            self._overviews.clear()
+        base = os.path.splitext(path)[0]
+        folder = base + "_chunks"
+        os.makedirs(folder, exist_ok=True)
+        nb_rendered = 0
+        for chunk in [chunk for chunk, positions in self._positions.items() if positions]:
+            if chunk in self._dirty or chunk not in self._overviews:
+                raster = Image.fromarray(self._render_chunk(chunk, closed, fast_mode))
+                raster.save(os.path.join(folder, _chunk_file(chunk)), compress_level=1)
+                self._overviews[chunk] = np.asarray(raster.reduce(OVERVIEW_REDUCTION))
+                nb_rendered += 1
+        self._dirty.clear()
+
+        # Chunks left with no tile once drawn again are dropped
+        chunks = [chunk for chunk, positions in self._positions.items() if positions]
+        for chunk in [chunk for chunk in self._overviews if not self._positions[chunk]]:
+            del self._overviews[chunk]
+        x_min, x_max, y_min, y_max = extent
+        cx_min, cx_max = m.floor((x_min - _HEXAGON_SIZE) / CHUNK_SIZE), m.floor((x_max + _HEXAGON_SIZE) / CHUNK_SIZE)
+        cy_min, cy_max = m.floor((y_min - _HEXAGON_SIZE) / CHUNK_SIZE), m.floor((y_max + _HEXAGON_SIZE) / CHUNK_SIZE)
+
+        # Overview, from the reduced rasters
+        size = CHUNK_SIZE * PIXELS_PER_UNIT // OVERVIEW_REDUCTION
+        image = np.zeros(((cy_max - cy_min + 1) * size, (cx_max - cx_min + 1) * size, 3), dtype=np.uint8)
+        for chunk in chunks:
+            row, col = (cy_max - chunk[1]) * size, (chunk[0] - cx_min) * size
+            image[row:row + size, col:col + size] = self._overviews[chunk]
+        Image.fromarray(image).save(path, compress_level=1)
+
+        # Page of the chunks at full resolution
+        size = CHUNK_SIZE * PIXELS_PER_UNIT
+        with open(base + ".html", 'w') as file:
+            file.write(f'<html><body style="margin: 0; background: black">\n'
+                       f'<div style="position: relative; width: {(cx_max - cx_min + 1) * size}px; '
+                       f'height: {(cy_max - cy_min + 1) * size}px">\n')
+            for chunk in chunks:
+                file.write(f'<img src="{os.path.basename(folder)}/{_chunk_file(chunk)}" style="position: absolute; '
+                           f'left: {(chunk[0] - cx_min) * size}px; top: {(cy_max - chunk[1]) * size}px">\n')
+            file.write('</div>\n</body></html>\n')
+        return nb_rendered
+
+    def _get_chunks(self, pos: Tuple[int, int]) -> List[Chunk]:
+        """Chunks overlapped by the hexagon of a tile."""
+        x, y = self._tr(*pos)
+        r = _HEXAGON_SIZE
+        return [(cx, cy) for cx in range(m.floor((x - r) / CHUNK_SIZE), m.floor((x + r) / CHUNK_SIZE) + 1)
+                for cy in range(m.floor((y - r) / CHUNK_SIZE), m.floor((y + r) / CHUNK_SIZE) + 1)]
+
+    def _render_chunk(self, chunk: Chunk, closed_positions: Set[Tuple[int, int]], fast_mode: bool) -> np.ndarray:
+        """Draw the tiles overlapping a chunk.
+
+        :return: RGB raster of the chunk.
+        """
+        tiles = [tile for tile in (self._get_tile(*pos) for pos in self._positions[chunk]) if tile]
+        self._positions[chunk] = {tile.get_pos() for tile in tiles}
+
+        fig = Figure(figsize=(CHUNK_SIZE, CHUNK_SIZE), dpi=PIXELS_PER_UNIT)
+        fig.set_facecolor("black")
+        ax = fig.add_axes((0, 0, 1, 1))
+        ax.set_axis_off()
+        ax.set_xlim(chunk[0] * CHUNK_SIZE, (chunk[0] + 1) * CHUNK_SIZE)
+        ax.set_ylim(chunk[1] * CHUNK_SIZE, (chunk[1] + 1) * CHUNK_SIZE)
+
+        if tiles:
+            positions = np.array([tile.get_pos() for tile in tiles], dtype=float)
+            centers = np.column_stack(self._tr(positions[:, 0], positions[:, 1]))
+            full = np.array([tile.state == Tile.State.FULL for tile in tiles], dtype=bool)
+            closed = np.zeros(len(tiles), dtype=bool)
+            if fast_mode:
+                closed = np.array([tile.get_pos() in closed_positions for tile in tiles], dtype=bool)
+            opened = full & ~closed
+
+            # Closed tiles as gray hexagons, opened ones as 6 colored trapezoids, empty slots as gray outlines
+            ax.add_collection(PolyCollection(
+                centers[closed, None, :] + HEXAGON_OFFSETS, facecolors='gray', edgecolors='none'
+            ), autolim=False)
+            ax.add_collection(PolyCollection(
+                (centers[opened, None, None, :] + TRAPEZOID_OFFSETS).reshape(-1, 4, 2), edgecolors='none',
+                facecolors=[self._colors[e] for tile, o in zip(tiles, opened) if o for e in tile.get_edges()],
+            ), autolim=False)
+            ax.add_collection(LineCollection(
+                (centers[~full, None, None, :] + TRAPEZOID_OFFSETS[:, [0, 1, 2, 3, 0]]).reshape(-1, 5, 2),
+                colors='gray'
+            ), autolim=False)
+
+            # Coordinates of the tiles drawn, as a single path
+            ax.add_collection(PathCollection(
+                [_labels_path([str(tile.get_pos()) for tile, c in zip(tiles, closed) if not c], centers[~closed])],
+                facecolors='white', edgecolors='none'
+            ), autolim=False)
+
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        return np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+
+
+def _chunk_file(chunk: Chunk) -> str:
+    """Image file of a chunk, in the chunks folder."""
+    return f"{chunk[0]}_{chunk[1]}.png"
+
+
+_GLYPHS: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+
+
+def _get_glyph(char: str) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Vertices, codes and advance of a character of the labels, in board units."""
+    if char not in _GLYPHS:
+        advance = TextPath((0, 0), "|" + char + "|", size=LABEL_SIZE).get_extents().x1 - \
+            TextPath((0, 0), "||", size=LABEL_SIZE).get_extents().x1
+        if char.isspace():
+            _GLYPHS[char] = (np.empty((0, 2)), np.empty(0, dtype=Path.code_type), advance)
+        else:
+            path = TextPath((0, 0), char, size=LABEL_SIZE)
+            _GLYPHS[char] = (path.vertices, path.codes, advance)
+    return _GLYPHS[char]
+
+
+def _labels_path(labels: List[str], centers: np.ndarray) -> Path:
+    """Build a single path writing each label centered on its coordinates, from cached glyphs."""
+    vertices, codes = [], []
+    for label, (x, y) in zip(labels, centers):
+        glyphs = [_get_glyph(char) for char in label]
+        x -= sum(advance for _, _, advance in glyphs) / 2
+        for glyph_vertices, glyph_codes, advance in glyphs:
+            vertices.append(glyph_vertices + (x, y - LABEL_SIZE * 0.36))
+            codes.append(glyph_codes)
+            x += advance
+    if not vertices:
+        return Path(np.empty((0, 2)))
+    return Path(np.concatenate(vertices), np.concatenate(codes))
@@ -0,0 +1,58 @@
+"""Vectorized scoring of a tile against the frontier."""
+from typing import List, NamedTuple
+
+import numpy as np
+
+from tile import Tile
+
+
+class Scores(NamedTuple):
+    """Evaluation of each rotation of a tile on each slot, arrays of shape (N slots, R rotations)."""
+    conflicts: np.ndarray
+    matches: np.ndarray
+    five_of_six: np.ndarray
+    values: np.ndarray
+
+
+class ScoringEngine:
+    """Scores all the rotations of a tile on all the slots at once, through lookup table gathers."""
+
+    def __init__(self, edge_match: List[List[bool]], edge_compatible: List[List[bool]],
+                 edge_pair_value: List[List[int]], edge_value: List[int]):
+        """
+        :param edge_match: edge match table, indexed by [candidate edge][neighbor edge].
+        :param edge_compatible: edge compatibility table, indexed by [candidate edge][neighbor edge].
+        :param edge_pair_value: value of matched edges, indexed by [candidate edge][neighbor edge].
+        :param edge_value: value of each edge.
+        """
+        self._match = np.array(edge_match, dtype=bool)
+        self._compatible = np.array(edge_compatible, dtype=bool)
+        self._pair_value = np.array(edge_pair_value, dtype=np.int32)
+        self._value = np.array(edge_value, dtype=np.int32)
+
+    def score(self, rotations: List[List[Tile.Edge]], neighbor_edges: np.ndarray, n_neighbors: np.ndarray) -> Scores:
+        """Evaluate each rotation of a tile on each slot.
+
+        A rotation matches a slot without conflict, or is a 5/6 match if the slot is closed and exactly one edge
+        doesn't match but stays compatible. The value adds what is matched and removes what is left behind.
+
+        :param rotations: edges of each rotation of the tile, (R, 6).
+        :param neighbor_edges: edges facing each slot, EMPTY if no full neighbor, (N, 6).
+        :param n_neighbors: number of full neighbors of each slot, (N,).
+        :return: scores.
+        """
+        candidates = np.asarray(rotations, dtype=np.intp)[None, :, :]  # (1, R, 6)
+        neighbors = neighbor_edges.astype(np.intp)[:, None, :]  # (N, 1, 6)
+        full = neighbors != Tile.Edge.EMPTY
+
+        mismatches = full & ~self._match[candidates, neighbors]
+        incompatibles = mismatches & ~self._compatible[candidates, neighbors]
+        conflicts = mismatches.sum(axis=2)
+        values = np.where(full, self._pair_value[candidates, neighbors], -self._value[candidates]).sum(axis=2)
+
+        return Scores(
+            conflicts=conflicts,
+            matches=conflicts == 0,
+            five_of_six=(conflicts == 1) & ~incompatibles.any(axis=2) & (n_neighbors == 6)[:, None],
+            values=values,
+        )
@@ -0,0 +1,268 @@
+"""Local JSON over HTTP service, keeping one board in memory.
+
+Every endpoint takes a POST with a JSON body and answers JSON, errors as {"error": message}:
+  /help           {"edges": [6 edges], "top": 10}
+  /place          {"x": x, "y": y, "edges": [6 edges]}
+  /undo           {}
+  /find-tile      {"edges": [6 edges]}
+  /find-candidate {"edges": [6 edges]}
+  /render         {"fast": false}
+  /metrics        {} latencies of the requests answered so far, by endpoint
+
+Readers run concurrently, writers (place, undo) one at a time with no reader running.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from board import Board
+from cli import help_to_dict, parse_edges, parse_tile, tile_to_dict, TOP_MATCHES
+
+HOST = "127.0.0.1"  # local only
+PORT = 8765
+LATENCY_WINDOW = 1000  # latest requests of each endpoint kept for the percentiles
+MAX_BODY_SIZE = 1 << 16
+OTHER_ENDPOINT = "other"  # metrics key of the requests to unknown paths
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class ReadWriteLock:
+    """Lock shared by the readers or held by one writer. A waiting writer goes before the readers coming after it."""
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    async def acquire_read(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writing and not self._writers_waiting)
+            self._readers += 1
+
+    async def release_read(self) -> None:
+        async with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    async def acquire_write(self) -> None:
+        async with self._condition:
+            self._writers_waiting += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writing and not self._readers)
+            finally:
+                self._writers_waiting -= 1
+            self._writing = True
+
+    async def release_write(self) -> None:
+        async with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+
+class Metrics:
+    """Number of requests, errors and latencies of each endpoint."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """
+        :param window: latest latencies kept for the percentiles.
+        """
+        self._window = window
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def record(self, endpoint: str, latency: float, error: bool) -> None:
+        """Count a request answered.
+
+        :param endpoint: path of the request, OTHER_ENDPOINT for an unknown one.
+        :param latency: seconds from the request read to the answer sent.
+        :param error: whether an error was answered.
+        """
+        self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+        self._errors[endpoint] = self._errors.get(endpoint, 0) + error
+        self._latencies.setdefault(endpoint, deque(maxlen=self._window)).append(latency)
+
+    def summary(self) -> Dict:
+        """Requests, errors and latency percentiles in milliseconds, by endpoint."""
+        summary = {}
+        for endpoint, latencies in self._latencies.items():
+            ordered = sorted(latencies)
+            summary[endpoint] = {
+                "requests": self._counts[endpoint],
+                "errors": self._errors[endpoint],
+                "mean_ms": round(1000 * sum(ordered) / len(ordered), 3),
+                **{f"p{p}_ms": round(1000 * ordered[min(len(ordered) - 1, len(ordered) * p // 100)], 3)
+                   for p in (50, 95, 99)},
+                "max_ms": round(1000 * ordered[-1], 3),
+            }
+        return summary
+
+
+class Server:
+    """Board kept warm behind a local HTTP server. Board calls run in threads, not to block the event loop."""
+
+    def __init__(self, board: Board, port: int = PORT, logger: Callable = lambda _: None):
+        """
+        :param board: board served.
+        :param port: port listened to, on the local interface only. 0 picks a free one.
+        :param logger: logger callable.
+        """
+        self._board = board
+        self._port = port
+        self._logger = logger
+        self._lock = ReadWriteLock()
+        self._render_lock = asyncio.Lock()  # the renderer keeps its chunks between renders
+        self._executor = ThreadPoolExecutor(thread_name_prefix="board")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.metrics = Metrics()
+        self._readers: Dict[str, Callable[[Dict], Dict]] = {
+            "/help": lambda body: help_to_dict(board, parse_edges(_param(body, "edges")),
+                                              int(body.get("top", TOP_MATCHES))),
+            "/find-tile": lambda body: {"tiles": board.find_tile(parse_edges(_param(body, "edges")))},
+            "/find-candidate": lambda body: {"candidates": board.find_candidate(parse_edges(_param(body, "edges")))},
+            "/render": lambda body: {"image": os.path.abspath(board.render(fast_mode=bool(body.get("fast"))))},
+        }
+        self._writers: Dict[str, Callable[[Dict], Dict]] = {
+            "/place": lambda body: {"placed": tile_to_dict(board.place_tile(
+                parse_tile([_param(body, "x"), _param(body, "y"), *_param(body, "edges")])
+            ))},
+            "/undo": self._undo,
+        }
+
+    @property
+    def port(self) -> int:
+        """Port listened to, once started."""
+        return self._server.sockets[0].getsockname()[1] if self._server else self._port
+
+    async def start(self) -> None:
+        """Listen to the requests."""
+        self._server = await asyncio.start_server(self._handle, HOST, self._port)
+        self._logger(f"Listening on http://{HOST}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        """Listen to the requests until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening, once the requests running are answered."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+
+    def _undo(self, _: Dict) -> Dict:
+        last_placement = tile_to_dict(self._board.last_placement) if self._board.last_placement else None
+        self._board.undo()
+        return {"undone": last_placement}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one request, the connection is then closed."""
+        try:
+            request = await self._read_request(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            writer.close()
+            return
+        t0 = time.perf_counter()
+        status, answer = await self._dispatch(*request)
+        body = json.dumps(answer).encode()
+        writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+        path = request[1]
+        known = path in self._readers or path in self._writers or path == "/metrics"
+        self.metrics.record(path if known else OTHER_ENDPOINT, time.perf_counter() - t0, status != 200)
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Optional[bytes]]:
+        """Method, path and body of a request, None for a body too large.
+
+        :raise ValueError: malformed request.
+        """
+        method, path, _ = (await reader.readuntil(b"\r\n")).decode("latin-1").split(" ", 2)
+        length = 0
+        while True:
+            line = (await reader.readuntil(b"\r\n")).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        path = path.split("?")[0]
+        if length > MAX_BODY_SIZE:
+            return method, path, None
+        return method, path, await reader.readexactly(length) if length else b""
+
+    async def _dispatch(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, Dict]:
+        """Status and answer of a request."""
+        if path not in self._readers and path not in self._writers and path != "/metrics":
+            return 404, {"error": f"Unknown endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": "POST expected"}
+        if body is None:
+            return 413, {"error": "Body too large"}
+        if path == "/metrics":
+            return 200, self.metrics.summary()
+        try:
+            content = json.loads(body or b"{}")
+            if not isinstance(content, dict):
+                raise Exception("JSON object expected")
+        except Exception as e:
+            return 400, {"error": f"Invalid body: {e}"}
+
+        loop = asyncio.get_running_loop()
+        try:
+            if path in self._writers:
+                await self._lock.acquire_write()
+                try:
+                    return 200, await loop.run_in_executor(self._executor, self._writers[path], content)
+                finally:
+                    await self._lock.release_write()
+            await self._lock.acquire_read()
+            try:
+                if path == "/render":
+                    async with self._render_lock:
+                        return 200, await loop.run_in_executor(self._executor, self._readers[path], content)
+                return 200, await loop.run_in_executor(self._executor, self._readers[path], content)
+            finally:
+                await self._lock.release_read()
+        except Exception as e:
+            return 400, {"error": str(e)}
+
+
+def _param(body: Dict, name: str):
+    """Parameter of a request body.
+
+    :raise Exception: missing parameter.
+    """
+    if name not in body:
+        raise Exception(f"Missing {name!r}")
+    return body[name]
+
+
+def serve(board: Board, port: int = PORT, logger: Callable = lambda _: None) -> None:
+    """Serve a board until interrupted.
+
+    :param board: board served.
+    :param port: port listened to, on the local interface only.
+    :param logger: logger callable.
+    """
+    server = Server(board, port, logger)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger("Server stopped")
@@ -0,0 +1,130 @@
+"""Signature index of the full tiles."""
+import threading
+from collections import OrderedDict
+from itertools import product
+from typing import Dict, List, NamedTuple, Tuple
+
+from tile import Tile
+
+CACHE_SIZE = 1024
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of the cache of find_compatible."""
+    hits: int
+    misses: int
+    invalidations: int
+    size: int
+    max_size: int
+
+
+class SignatureIndex:
+    """Full tiles indexed by the canonical rotation of their packed edges.
+
+    The keys compatible with the edges searched are kept in an LRU cache, by canonical rotation of the edges searched.
+    Only a tile adding a new key can change them, the entries it is compatible with are then dropped. Searches can
+    run from several threads at once.
+    """
+
+    def __init__(self, edge_match: List[List[bool]], cache_size: int = CACHE_SIZE):
+        """
+        :param edge_match: edge match table, indexed by [e1][e2].
+        :param cache_size: maximum number of searches cached.
+        """
+        self._edge_match = edge_match
+        self._tiles: Dict[int, Dict[Tuple[int, int], Tile]] = {}
+        # Canonical edges searched -> options of each edge and keys compatible
+        self._cache: OrderedDict[int, Tuple[List[List[Tile.Edge]], List[int]]] = OrderedDict()
+        self._cache_size = cache_size
+        self._hits = self._misses = self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def add(self, tile: Tile) -> None:
+        """Index a full tile.
+
+        :param tile: full tile.
+        """
+        key = Tile.canonical(Tile.pack(tile.get_edges()))
+        if key not in self._tiles:
+            self._invalidate(key)
+        self._tiles.setdefault(key, {})[tile.get_pos()] = tile
+
+    def remove(self, tile: Tile) -> None:
+        """Remove a full tile from the index, if present.
+
+        :param tile: full tile.
+        """
+        key = Tile.canonical(Tile.pack(tile.get_edges()))
+        tiles = self._tiles.get(key, {})
+        tiles.pop(tile.get_pos(), None)
+        if not tiles:
+            self._tiles.pop(key, None)
+
+    def find(self, edges: List[Tile.Edge]) -> List[Tile]:
+        """Find the tiles equal to the given edges, in any rotation.
+
+        :param edges: edges of the tile.
+        :return: tiles found.
+        """
+        return list(self._tiles.get(Tile.canonical(Tile.pack(edges)), {}).values())
+
+    def find_compatible(self, edges: List[Tile.Edge]) -> List[Tile]:
+        """Find the tiles matching the given edges, in any rotation.
+
+        The canonical keys compatible with the edges are enumerated, unless they outnumber the indexed keys, in
+        which case the indexed keys are tested instead.
+
+        :param edges: edges of the tile.
+        :return: tiles found.
+        """
+        signature = Tile.canonical(Tile.pack(edges))
+        with self._lock:
+            if signature in self._cache:
+                self._hits += 1
+                self._cache.move_to_end(signature)
+            else:
+                self._misses += 1
+                options = self._options(Tile.unpack(signature))
+                self._cache[signature] = options, self._find_compatible_keys(options)
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            keys = self._cache[signature][1]
+        return [tile for key in keys for tile in self._tiles.get(key, {}).values()]
+
+    def cache_info(self) -> CacheInfo:
+        """Statistics of the cache of find_compatible.
+
+        :return: hits, misses, invalidations and size.
+        """
+        return CacheInfo(self._hits, self._misses, self._invalidations, len(self._cache), self._cache_size)
+
+    def _find_compatible_keys(self, options: List[List[Tile.Edge]]) -> List[int]:
+        """Keys of the tiles fitting the options of each edge, in any rotation."""
+        nb_combinations = 1
+        for option in options:
+            nb_combinations *= len(option)
+
+        if nb_combinations <= len(self._tiles):
+            keys = {Tile.canonical(Tile.pack(combination)) for combination in product(*options)}
+            return [key for key in keys if key in self._tiles]
+        return [key for key in self._tiles if self._matches(key, options)]
+
+    def _invalidate(self, key: int) -> None:
+        """Drop the cached searches a new key is compatible with."""
+        with self._lock:
+            for signature in [s for s, (options, _) in self._cache.items() if self._matches(key, options)]:
+                del self._cache[signature]
+                self._invalidations += 1
+
+    def _options(self, edges: List[Tile.Edge]) -> List[List[Tile.Edge]]:
+        """Edges matching each given edge."""
+        return [[e for e in Tile.Edge if self._edge_match[e][edge]] for edge in edges]
+
+    @staticmethod
+    def _matches(key: int, options: List[List[Tile.Edge]]) -> bool:
+        """Verify if a rotation of the packed code fits the options of each edge."""
+        for i in range(6):
+            code = Tile.rotate_code(key, i)
+            if all(((code >> (4 * j)) & 0xF) in options[j] for j in range(6)):
+                return True
+        return False
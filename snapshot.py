@@ -0,0 +1,70 @@
+"""Binary snapshot of the board, saved next to the data file."""
+import os
+import struct
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+SNAPSHOT_EXTENSION = '.snap'
+
+TILE_DTYPE = np.dtype([('x', '<i4'), ('y', '<i4'), ('code', '<u4')])
+SLOT_DTYPE = np.dtype([('x', '<i4'), ('y', '<i4'), ('edges', 'u1', (6,))])
+
+# Magic, version, data file size and modification time, number of tiles and slots
+_HEADER = struct.Struct('<8sIqqII')
+_MAGIC = b'DORFSNAP'
+_VERSION = 1
+
+
+class Snapshot(NamedTuple):
+    """Full tiles (coordinates and packed edges) and frontier slots (coordinates and edges facing them)."""
+    tiles: np.ndarray
+    slots: np.ndarray
+
+
+def get_path(data_path: str) -> str:
+    """Path of the snapshot of a data file."""
+    return os.path.splitext(data_path)[0] + SNAPSHOT_EXTENSION
+
+
+def save(data_path: str, snapshot: Snapshot) -> None:
+    """Write the snapshot of a data file, stamped with the data file size and modification time.
+
+    :param data_path: data file the snapshot corresponds to.
+    :param snapshot: tiles and slots to write.
+    """
+    stat = os.stat(data_path)
+    tmp_path = get_path(data_path) + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(_HEADER.pack(
+            _MAGIC, _VERSION, stat.st_size, stat.st_mtime_ns, len(snapshot.tiles), len(snapshot.slots)
+        ))
+        file.write(np.ascontiguousarray(snapshot.tiles, dtype=TILE_DTYPE).tobytes())
+        file.write(np.ascontiguousarray(snapshot.slots, dtype=SLOT_DTYPE).tobytes())
+    os.replace(tmp_path, get_path(data_path))
+
+
+def load(data_path: str) -> Optional[Snapshot]:
+    """Memory map the snapshot of a data file.
+
+    :param data_path: data file the snapshot corresponds to.
+    :return: snapshot, None if missing, invalid or stale.
+    """
+    path = get_path(data_path)
+    if not os.path.isfile(path) or os.path.getsize(path) < _HEADER.size:
+        return None
+    with open(path, 'rb') as file:
+        magic, version, size, mtime_ns, nb_tiles, nb_slots = _HEADER.unpack(file.read(_HEADER.size))
+    stat = os.stat(data_path)
+    if magic != _MAGIC or version != _VERSION or (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+        return None
+    if os.path.getsize(path) != _HEADER.size + nb_tiles * TILE_DTYPE.itemsize + nb_slots * SLOT_DTYPE.itemsize:
+        return None
+
+    offset = _HEADER.size
+    tiles = np.memmap(path, dtype=TILE_DTYPE, mode='r', offset=offset, shape=(nb_tiles,)) if nb_tiles else \
+        np.empty(0, dtype=TILE_DTYPE)
+    offset += nb_tiles * TILE_DTYPE.itemsize
+    slots = np.memmap(path, dtype=SLOT_DTYPE, mode='r', offset=offset, shape=(nb_slots,)) if nb_slots else \
+        np.empty(0, dtype=SLOT_DTYPE)
+    return Snapshot(tiles, slots)
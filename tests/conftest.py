@@ -0,0 +1,5 @@
+"""Modules of the repository imported from its root."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
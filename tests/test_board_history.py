@@ -0,0 +1,156 @@
+"""Undo, redo, transactions, journal and compaction, against a board rebuilt from scratch with the same tiles."""
+import itertools
+import random
+
+import pytest
+
+import board as board_module
+import generator
+from board import Board
+from features import FEATURES
+from tile import Tile
+
+_rebuilds = itertools.count()
+
+
+def _state(board: Board) -> dict:
+    """Everything the board keeps up to date as tiles are placed and removed."""
+    snapshot = board.get_snapshot()
+    tiles = sorted(snapshot.tiles.tolist())
+    frontier = board._frontier
+    edges, counts = frontier.get_arrays()
+    rows = {frontier.get_slot(row).get_pos(): row for row in range(len(frontier))}
+    postings = {(side, edge): sorted(pos for pos, row in rows.items() if row in frontier._postings.get(side, edge))
+                for side in range(6) for edge in Tile.Edge}
+    distinct = {code: Tile.unpack(code) for _, _, code in tiles}
+    return {
+        "tiles": tiles,
+        "slots": sorted((x, y, tuple(slot_edges)) for x, y, slot_edges in snapshot.slots.tolist()),
+        "database": sorted((tile.get_pos(), tile.code, tile.state) for tile in board._database.get_tiles()),
+        "frontier": sorted((pos, tuple(edges[row].tolist()), int(counts[row]), frontier.count(frontier.get_slot(row)))
+                           for pos, row in rows.items()),
+        "postings": postings,
+        "groups": {(x, y, feature): board.get_group(x, y, feature) for x, y, code in tiles
+                   for feature in set(distinct[code]) if feature in FEATURES},
+        "find_tile": {code: sorted(board.find_tile(edges)) for code, edges in distinct.items()},
+        "closure": {pos: board._closure.probability(frontier.get_edges(frontier.get_slot(row)))
+                    for pos, row in rows.items()},
+    }
+
+
+def _rebuilt(board: Board, tmp_path) -> Board:
+    """Board loaded from a data file of the tiles of a board, in the order of its database."""
+    directory = tmp_path / f"rebuilt{next(_rebuilds)}"
+    directory.mkdir()
+    path = str(directory / "DATA.csv")
+    generator.write_data_file(path, [Tile.from_code(x, y, code) for x, y, code in board.get_snapshot().tiles.tolist()])
+    return Board(lambda _: None, data_file=path)
+
+
+def _place_random(board: Board, rnd: random.Random) -> Tile:
+    """Place random edges on a random slot, conflicts included."""
+    slot = board._frontier.get_slot(rnd.randrange(len(board._frontier)))
+    return board.place_tile(Tile(slot.x, slot.y, [Tile.Edge(rnd.randint(1, 8)) for _ in range(6)]), show=False)
+
+
+@pytest.fixture
+def data_file(tmp_path) -> str:
+    path = str(tmp_path / "DATA.csv")
+    generator.write_data_file(path, generator.generate(200, seed=3))
+    return path
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_history(data_file, tmp_path, seed):
+    """Random placements, undos and redos leave the board as if its tiles were placed from scratch."""
+    rnd = random.Random(seed)
+    board = Board(lambda _: None, data_file=data_file)
+    for step in range(120):
+        action = rnd.random()
+        if action < 0.5:
+            _place_random(board, rnd)
+        elif action < 0.8:
+            board.undo(show=False)
+        else:
+            board.redo(show=False)
+        if step % 30 == 29:
+            assert _state(board) == _state(_rebuilt(board, tmp_path))
+
+
+def test_undo_redo(data_file):
+    rnd = random.Random(0)
+    board = Board(lambda _: None, data_file=data_file)
+    start = _state(board)
+    placed = [_place_random(board, rnd) for _ in range(40)]
+    end = _state(board)
+    assert board.last_placement is placed[-1]
+    for _ in range(45):  # past the first placement
+        board.undo(show=False)
+    assert board.last_placement is None
+    assert _state(board) == start
+    for _ in range(45):  # past the last placement
+        board.redo(show=False)
+    assert _state(board) == end
+
+    board.undo(show=False)
+    _place_random(board, rnd)
+    before = _state(board)
+    board.redo(show=False)  # a placement forgets what was undone
+    assert _state(board) == before
+
+
+def test_transaction_rollback(data_file):
+    rnd = random.Random(1)
+    board = Board(lambda _: None, data_file=data_file)
+    _place_random(board, rnd)
+    before, last_placement, nb_entries = _state(board), board.last_placement, len(board._journal)
+    with board.transaction():
+        for _ in range(20):
+            _place_random(board, rnd)
+        for _ in range(30):  # the placements made before the transaction are kept
+            board.undo(show=False)
+        for _ in range(5):
+            _place_random(board, rnd)
+    assert _state(board) == before
+    assert board.last_placement is last_placement
+    assert len(board._journal) == nb_entries
+
+    with pytest.raises(Exception):
+        with board.transaction():
+            _place_random(board, rnd)
+            raise Exception("search failed")
+    assert _state(board) == before
+
+
+def test_journal_replay(data_file):
+    """A board loaded again replays the journal: its snapshot is stale once tiles are placed."""
+    rnd = random.Random(2)
+    board = Board(lambda _: None, data_file=data_file)
+    for _ in range(60):
+        if rnd.random() < 0.7:
+            _place_random(board, rnd)
+        else:
+            board.undo(show=False)
+    board._journal.close()
+    assert _state(Board(lambda _: None, data_file=data_file)) == _state(board)
+
+
+def test_compaction(data_file, tmp_path, monkeypatch):
+    """The journal is folded into the data file once large enough, and the placements can no longer be undone."""
+    monkeypatch.setattr(board_module, "JOURNAL_COMPACT_SIZE", 10)
+    rnd = random.Random(3)
+    board = Board(lambda _: None, data_file=data_file)
+    for _ in range(10):
+        _place_random(board, rnd)
+    assert len(board._journal) == 10
+    _place_random(board, rnd)  # compacts the 10 first placements first
+    assert len(board._journal) == 1
+    board.undo(show=False)
+    compacted = _state(board)
+    board.undo(show=False)
+    assert board.last_placement is None
+    assert _state(board) == compacted == _state(_rebuilt(board, tmp_path))
+
+    board.save_data()
+    board._journal.close()
+    assert _state(Board(lambda _: None, data_file=data_file)) == compacted
@@ -0,0 +1,46 @@
+"""Edge tables against the scalar edge functions, over the 81 pairs of edges."""
+import itertools
+
+import numpy as np
+
+from board import Board, EDGE_COMPATIBLE, EDGE_MATCH, EDGE_MATCHING, EDGE_PAIR_VALUE, EDGE_VALUE
+from scoring import ScoringEngine
+from tile import Tile
+
+PAIRS = list(itertools.product(Tile.Edge, repeat=2))
+
+
+def test_pairs_count():
+    assert len(PAIRS) == 81
+
+
+def test_edge_match():
+    for e1, e2 in PAIRS:
+        assert EDGE_MATCH[e1][e2] == Board._edge_match(e1, e2), (e1, e2)
+
+
+def test_edge_compatible():
+    for e1, e2 in PAIRS:
+        assert EDGE_COMPATIBLE[e1][e2] == Board._edge_compatible(e1, e2), (e1, e2)
+
+
+def test_edge_pair_value():
+    for e1, e2 in PAIRS:
+        assert EDGE_PAIR_VALUE[e1][e2] == EDGE_VALUE.get(e1, 0) + EDGE_VALUE.get(e2, 0), (e1, e2)
+
+
+def test_edge_matching():
+    for e1 in Tile.Edge:
+        assert EDGE_MATCHING[e1] == [e2 for e2 in Tile.Edge if e2 != Tile.Edge.EMPTY and Board._edge_match(e1, e2)]
+
+
+def test_scoring_engine():
+    """A tile of a single edge on a slot facing a single full edge, scored like help_me did edge by edge."""
+    engine = ScoringEngine(EDGE_MATCH, EDGE_COMPATIBLE, EDGE_PAIR_VALUE, [EDGE_VALUE.get(e, 0) for e in Tile.Edge])
+    full_edges = [e for e in Tile.Edge if e != Tile.Edge.EMPTY]
+    for e1, e2 in itertools.product(full_edges, repeat=2):
+        neighbor_edges = np.array([[e2] + [Tile.Edge.EMPTY] * 5], dtype=np.uint8)
+        scores = engine.score([[e1] * 6], neighbor_edges, np.count_nonzero(neighbor_edges, axis=1))
+        assert bool(scores.matches[0, 0]) == Board._edge_match(e1, e2), (e1, e2)
+        assert int(scores.conflicts[0, 0]) == (not Board._edge_match(e1, e2)), (e1, e2)
+        assert int(scores.values[0, 0]) == EDGE_VALUE.get(e1, 0) + EDGE_VALUE.get(e2, 0) - 5 * EDGE_VALUE.get(e1, 0)
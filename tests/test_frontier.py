@@ -0,0 +1,91 @@
+"""Frontier rows, counts and postings against a plain model of the slots, after random changes."""
+import random
+
+import pytest
+
+from board import EDGE_MATCH, EDGE_MATCHING
+from frontier import Frontier
+from tile import Tile
+
+
+def _check(frontier: Frontier, model: dict) -> None:
+    """Compare the frontier to the edges facing each slot."""
+    assert len(frontier) == len(model)
+    edges, counts = frontier.get_arrays()
+    rows = {}
+    for row in range(len(frontier)):
+        slot = frontier.get_slot(row)
+        rows[slot.get_pos()] = row
+        assert edges[row].tolist() == model[slot.get_pos()]
+        assert counts[row] == frontier.count(slot) == 6 - model[slot.get_pos()].count(Tile.Edge.EMPTY)
+    assert set(rows) == set(model)
+    for side in range(6):
+        for edge in Tile.Edge:
+            expected = {rows[pos] for pos, slot_edges in model.items() if edge and slot_edges[side] == edge}
+            assert frontier._postings.get(side, edge) == expected, (side, edge)
+
+
+def _fits(rotations, slot_edges) -> bool:
+    """Whether a tile fits a slot with no conflict in one of its rotations, or all its sides but one."""
+    n = 6 - slot_edges.count(Tile.Edge.EMPTY)
+    for edges in rotations:
+        count = sum(1 for edge, facing in zip(edges, slot_edges) if facing and EDGE_MATCH[edge][facing])
+        if count == n or (count == 5 and n == 6):
+            return True
+    return False
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_changes(seed):
+    rnd = random.Random(seed)
+    frontier, model, slots = Frontier(), {}, {}
+    for step in range(2000):
+        action = rnd.random()
+        if action < 0.3 or not slots:
+            pos = rnd.randrange(-20, 20), rnd.randrange(-20, 20)
+            if pos in slots:
+                continue
+            slots[pos] = Tile(*pos)
+            model[pos] = [Tile.Edge.EMPTY] * 6
+            frontier.add(slots[pos])
+        elif action < 0.8:
+            pos = rnd.choice(list(slots))
+            side, edge = rnd.randrange(6), Tile.Edge(rnd.randrange(9))
+            model[pos][side] = edge
+            frontier.set_edge(slots[pos], side, edge)
+        else:
+            pos = rnd.choice(list(slots))
+            frontier.remove(slots.pop(pos))
+            del model[pos]
+        if step % 100 == 0:
+            _check(frontier, model)
+    _check(frontier, model)
+
+    for _ in range(50):
+        edges = [Tile.Edge(rnd.randint(1, 8)) for _ in range(6)]
+        rotations = [Tile.unpack(Tile.rotate_code(Tile.pack(edges), i)) for i in range(6)]
+        rows = frontier.find_rows(rotations, EDGE_MATCHING, 2)
+        expected = [row for row in range(len(frontier))
+                    if frontier.count(frontier.get_slot(row)) >= 2
+                    and _fits(rotations, model[frontier.get_slot(row).get_pos()])]
+        assert [row for row in rows.tolist() if _fits(rotations, model[frontier.get_slot(row).get_pos()])] == expected
+
+
+def test_remove_missing():
+    frontier = Frontier()
+    frontier.add(Tile(0, 0))
+    frontier.remove(Tile(1, 0))
+    assert len(frontier) == 1
+
+
+def test_remove_other_tile_object():
+    """A slot is removed by its position, whatever the Tile object given."""
+    frontier = Frontier()
+    for x in range(3):
+        frontier.add(Tile(x, 0))
+    frontier.set_edge(frontier.get_slot(2), 0, Tile.Edge.TREE)
+    frontier.remove(Tile(2, 0))  # last row
+    _check(frontier, {(0, 0): [Tile.Edge.EMPTY] * 6, (1, 0): [Tile.Edge.EMPTY] * 6})
+    frontier.set_edge(frontier.get_slot(1), 3, Tile.Edge.RIVER)
+    frontier.remove(Tile(0, 0))  # the last row moves to its place
+    _check(frontier, {(1, 0): [0, 0, 0, Tile.Edge.RIVER, 0, 0]})
@@ -0,0 +1,48 @@
+"""help_batch against rank_help, tile by tile."""
+import random
+
+import pytest
+
+import generator
+from board import Board
+from tile import Tile
+
+
+def _match(match) -> tuple:
+    return (match.tile.get_pos(), match.tile.code) + tuple(match[1:])
+
+
+def _answer(result) -> tuple:
+    ranking, five_of_six_matches = result
+    return (
+        len(ranking),
+        {n: [_match(match) for match in matches] for n, matches in ranking.get_by_neighbors().items()},
+        [_match(match) for match in ranking.get_best()],
+        ranking.best_value and _match(ranking.best_value), ranking.best_value_tied,
+        ranking.best_match and _match(ranking.best_match), ranking.best_match_tied,
+        [_match(match) for match in five_of_six_matches],
+    )
+
+
+@pytest.fixture(scope="module")
+def board(tmp_path_factory) -> Board:
+    path = str(tmp_path_factory.mktemp("board") / "DATA.csv")
+    generator.write_data_file(path, generator.generate(300, seed=1))
+    return Board(lambda _: None, data_file=path)
+
+
+@pytest.mark.parametrize("top", [1, 2, 5, 15])
+def test_help_batch_as_rank_help(board, top):
+    rnd = random.Random(top)
+    tiles = [[Tile.Edge(rnd.randint(1, 8)) for _ in range(6)] for _ in range(40)]
+    rotated = [Tile.unpack(Tile.rotate_code(Tile.pack(edges), 2)) for edges in tiles[:5]]
+    results = board.help_batch(tiles + rotated, top)
+    assert len(results) == len(tiles) + len(rotated)
+    for edges, result in zip(tiles, results):
+        assert _answer(result) == _answer(board.rank_help(edges, top)), edges
+    for i in range(len(rotated)):
+        assert results[len(tiles) + i] is results[i]  # searched once
+
+
+def test_help_batch_empty(board):
+    assert board.help_batch([]) == []
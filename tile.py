@@ -1,6 +1,6 @@
 """Tile object"""
 from enum import IntEnum
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 
 class Tile:
@@ -23,6 +23,8 @@ class Tile:
         EMPTY = 0
         FULL = 1
 
+    __slots__ = ('x', 'y', 'state', 'code', 'n0', 'n1', 'n2', 'n3', 'n4', 'n5')
+
     def __init__(self, x: int, y: int, edges: List['Tile.Edge'] = None):
         self.x = int(x)
         self.y = int(y)
@@ -48,25 +50,105 @@ class Tile:
         self.n4: Optional['Tile'] = None
         self.n5: Optional['Tile'] = None
 
-        # Edges
+        # Edges, packed 4 bits per side (see pack)
+        self.code: int = 0
         if edges:
             if len(edges) != 6:
                 raise Exception("Cannot initialize Tile: assign all 6 edges or none")
-            else:
-                self.e0: 'Tile.Edge' = edges[0]
-                self.e1: 'Tile.Edge' = edges[1]
-                self.e2: 'Tile.Edge' = edges[2]
-                self.e3: 'Tile.Edge' = edges[3]
-                self.e4: 'Tile.Edge' = edges[4]
-                self.e5: 'Tile.Edge' = edges[5]
-                self.state = Tile.State.FULL
-        else:
-            self.e0 = Tile.Edge.EMPTY
-            self.e1 = Tile.Edge.EMPTY
-            self.e2 = Tile.Edge.EMPTY
-            self.e3 = Tile.Edge.EMPTY
-            self.e4 = Tile.Edge.EMPTY
-            self.e5 = Tile.Edge.EMPTY
+            self.code = Tile.pack([Tile.Edge(e) for e in edges])
+            self.state = Tile.State.FULL
+
+    def edge(self, i: int) -> 'Tile.Edge':
+        """Retrieve the edge of a side.
+
+        :param i: side index.
+        :return: edge.
+        """
+        return _EDGES[(self.code >> (4 * i)) & 0xF]
+
+    def neighbor(self, i: int) -> Optional['Tile']:
+        """Retrieve the neighbor of a side.
+
+        :param i: side index.
+        :return: neighbor if any.
+        """
+        return _NEIGHBOR_SLOTS[i].__get__(self)
+
+    def set_neighbor(self, i: int, tile: Optional['Tile']) -> None:
+        """Link the neighbor of a side.
+
+        :param i: side index.
+        :param tile: neighbor.
+        """
+        _NEIGHBOR_SLOTS[i].__set__(self, tile)
+
+    @property
+    def neighbors(self) -> Tuple[Optional['Tile'], ...]:
+        """Neighbors of the tile, indexed by side."""
+        return self.n0, self.n1, self.n2, self.n3, self.n4, self.n5
+
+    def rotated(self, i: int) -> 'Tile':
+        """Copy of the tile rotated the same way as edges[i:] + edges[:i].
+
+        :param i: rotation.
+        :return: rotated tile, without neighbors.
+        """
+        return Tile.from_code(self.x, self.y, Tile.rotate_code(self.code, i))
+
+    @staticmethod
+    def from_code(x: int, y: int, code: int) -> 'Tile':
+        """Create a tile from its packed edges, without validation.
+
+        :param x: x coordinate.
+        :param y: y coordinate.
+        :param code: packed code, 0 for an empty slot.
+        :return: tile.
+        """
+        tile = Tile(x, y)
+        if code:
+            tile.code, tile.state = code, Tile.State.FULL
+        return tile
+
+    @staticmethod
+    def pack(edges: List['Tile.Edge']) -> int:
+        """Pack 6 edges into a 24-bit code, 4 bits per edge, edge 0 in the lowest bits.
+
+        :param edges: edges of the tile.
+        :return: packed code.
+        """
+        code = 0
+        for i, edge in enumerate(edges):
+            code |= int(edge) << (4 * i)
+        return code
+
+    @staticmethod
+    def unpack(code: int) -> List['Tile.Edge']:
+        """Unpack a 24-bit code into 6 edges.
+
+        :param code: packed code.
+        :return: edges of the tile.
+        """
+        return [_EDGES[(code >> (4 * i)) & 0xF] for i in range(6)]
+
+    @staticmethod
+    def rotate_code(code: int, i: int) -> int:
+        """Rotate a packed code the same way as edges[i:] + edges[:i].
+
+        :param code: packed code.
+        :param i: rotation.
+        :return: rotated packed code.
+        """
+        i %= 6
+        return ((code >> (4 * i)) | (code << (24 - 4 * i))) & 0xFFFFFF
+
+    @staticmethod
+    def canonical(code: int) -> int:
+        """Canonical form of a packed code: its minimal rotation.
+
+        :param code: packed code.
+        :return: canonical packed code.
+        """
+        return min(((code >> (4 * i)) | (code << (24 - 4 * i))) & 0xFFFFFF for i in range(6))
 
     def get_pos(self) -> (int, int):
         """Retrieve the coordinates of the tile."""
@@ -74,8 +156,8 @@ class Tile:
 
     def get_edges(self) -> List['Tile.Edge']:
         """Retrieve the edges of the tile."""
-        return [self.e0, self.e1, self.e2, self.e3, self.e4, self.e5]
+        return Tile.unpack(self.code)
+
 
-    def get_neighbors(self) -> List[Optional['Tile']]:
-        """Retrieve the neighbors of the tile."""
-        return [self.n0, self.n1, self.n2, self.n3, self.n4, self.n5]
+_EDGES: List[Tile.Edge] = list(Tile.Edge)
+_NEIGHBOR_SLOTS = tuple(getattr(Tile, 'n' + str(i)) for i in range(6))
@@ -2,7 +2,9 @@
 import logging
 import math as m
 import os.path
-from typing import Optional
+import re
+import time
+from typing import Optional, List
 
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtCore import Qt
@@ -10,15 +12,27 @@ from PyQt5.QtGui import QColor
 
 from board import Board, COLOR_MAPPING
 from tile import Tile
+from worker import Worker
 
 logger = logging.getLogger("root")
 
+TABLE_SIZE = 15  # matches displayed for each number of neighbors
+EDGES_INPUT = "edges"  # inputs the searches depend on, their pending results dropped when it changes
+QUEUE_INPUT = "queue"
+
 
 class MainWidget(QtWidgets.QWidget):
-    """Window."""
+    """Window. The board is used from a background worker, so that the window never freezes."""
+    _log = QtCore.pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, start: Optional[float] = None):
+        """
+        :param start: time the process started at, to measure the startup.
+        """
         super().__init__()
+        self._start = time.perf_counter() if start is None else start
+        self._shown = self._start  # time the window was shown at
+        self._log.connect(self._write_log)
 
         # Text display (declared first for logs)
         self._textDisplay = QtWidgets.QTextEdit()
@@ -30,7 +44,9 @@ class MainWidget(QtWidgets.QWidget):
         self._textDisplay.setStyleSheet("background-color: rgb(43, 43, 43); font-family: Consolas; font-size: 15px;")
 
         # Variables
-        self._board = Board(self._logger)
+        self._board: Optional[Board] = None  # loaded in the background once the window is shown
+        self._worker = Worker(self)
+        self._worker.failed.connect(self._logger)
         self._rotations = 0
         self._best_match: Optional[Tile] = None
         self._best_value: Optional[Tile] = None
@@ -82,6 +98,11 @@ class MainWidget(QtWidgets.QWidget):
         input_form_layout.setWidget(7, QtWidgets.QFormLayout.LabelRole, e5_label)
         input_form_layout.setWidget(7, QtWidgets.QFormLayout.FieldRole, self._e5)
 
+        # Edge inputs, indexed by side (rotated along with the preview)
+        self._edge_inputs = [self._e0, self._e1, self._e2, self._e3, self._e4, self._e5]
+        for edge_input in self._edge_inputs:
+            edge_input.textChanged.connect(lambda: self._worker.cancel_stale(EDGES_INPUT))
+
         # Buttons
         buttons_widget = QtWidgets.QWidget()
         buttons_layout = QtWidgets.QGridLayout(buttons_widget)
@@ -96,21 +117,43 @@ class MainWidget(QtWidgets.QWidget):
         push_button7 = QtWidgets.QPushButton("Fast Render", buttons_widget)
         push_button8 = QtWidgets.QPushButton("Full Render", buttons_widget)
         push_button9 = QtWidgets.QPushButton("Save", buttons_widget)
+        push_button10 = QtWidgets.QPushButton("Redo", buttons_widget)
+        push_button11 = QtWidgets.QPushButton("Profile", buttons_widget)
+        push_button11.setCheckable(True)
+        push_button12 = QtWidgets.QPushButton("Help Queue", buttons_widget)
+
+        # Queue of the next tiles, 6 edges each: "112233 445566"
+        self._queue = QtWidgets.QLineEdit(buttons_widget)
+        self._queue.setPlaceholderText("Next tiles: 112233 445566 ...")
+        self._queue.setStyleSheet("background-color: rgb(69, 73, 74);")
+        self._queue.returnPressed.connect(self._help_queue)
+        self._queue.textChanged.connect(lambda: self._worker.cancel_stale(QUEUE_INPUT))
 
         push_button0.clicked.connect(self._help_me)
         push_button1.clicked.connect(self._place_tile)
-        push_button2.clicked.connect(self._board.undo)
+        push_button2.clicked.connect(lambda: self._worker.submit(self._board.undo))
         push_button3.clicked.connect(self._place_best_match)
         push_button4.clicked.connect(self._place_best_value)
         push_button5.clicked.connect(self._find_candidate)
         push_button6.clicked.connect(self._find_tile)
         push_button7.clicked.connect(self._render_fast)
-        push_button8.clicked.connect(self._board.render)
-        push_button9.clicked.connect(self._board.save_data)
+        push_button8.clicked.connect(lambda: self._worker.submit(self._board.render))
+        push_button9.clicked.connect(lambda: self._worker.submit(self._board.save_data))
+        push_button10.clicked.connect(lambda: self._worker.submit(self._board.redo))
+        push_button11.toggled.connect(self._profile)
+        push_button12.clicked.connect(self._help_queue)
+
+        # Disabled until the board is loaded
+        self._board_widgets = [push_button0, push_button1, push_button2, push_button3, push_button4, push_button5,
+                               push_button6, push_button7, push_button8, push_button9, push_button10, push_button11,
+                               push_button12, self._queue]
+        for widget in self._board_widgets:
+            widget.setEnabled(False)
 
         buttons_layout.addWidget(push_button0, 0, 0, 1, 1)
         buttons_layout.addWidget(push_button1, 1, 0, 1, 1)
         buttons_layout.addWidget(push_button2, 2, 0, 1, 1)
+        buttons_layout.addWidget(push_button10, 3, 0, 1, 1)
         buttons_layout.addWidget(push_button3, 0, 1, 1, 1)
         buttons_layout.addWidget(push_button4, 1, 1, 1, 1)
         buttons_layout.addWidget(push_button5, 2, 1, 1, 1)
@@ -118,6 +161,9 @@ class MainWidget(QtWidgets.QWidget):
         buttons_layout.addWidget(push_button7, 0, 2, 1, 1)
         buttons_layout.addWidget(push_button8, 1, 2, 1, 1)
         buttons_layout.addWidget(push_button9, 2, 2, 1, 1)
+        buttons_layout.addWidget(push_button11, 3, 2, 1, 1)
+        buttons_layout.addWidget(self._queue, 4, 0, 1, 2)
+        buttons_layout.addWidget(push_button12, 4, 2, 1, 1)
 
         # Rotation buttons
         rot_buttons_widget = QtWidgets.QWidget()
@@ -132,6 +178,14 @@ class MainWidget(QtWidgets.QWidget):
         rot_buttons_layout.addWidget(push_button_l, 0, 0, 1, 1)
         rot_buttons_layout.addWidget(push_button_r, 0, 1, 1, 1)
 
+        # Busy indicator, shown while the worker runs
+        self._busy_bar = QtWidgets.QProgressBar()
+        self._busy_bar.setRange(0, 0)
+        self._busy_bar.setTextVisible(False)
+        self._busy_bar.setMaximumHeight(8)
+        self._busy_bar.hide()
+        self._worker.busy.connect(self._set_busy)
+
         # Window arrangement
         main_layout = QtWidgets.QHBoxLayout(self)  # ||
         layout_1 = QtWidgets.QVBoxLayout()  # =
@@ -140,6 +194,7 @@ class MainWidget(QtWidgets.QWidget):
 
         layout_1.addLayout(layout_11)
         layout_1.addWidget(buttons_widget)
+        layout_1.addWidget(self._busy_bar)
         layout_1.addStretch(1)
 
         layout_11.addWidget(input_form_widget)
@@ -151,6 +206,23 @@ class MainWidget(QtWidgets.QWidget):
         main_layout.addLayout(layout_1)
         main_layout.addWidget(self._textDisplay, 1)
 
+        # Load the board once the event loop runs, the window being shown
+        QtCore.QTimer.singleShot(0, self._load_board)
+
+    def _load_board(self):
+        """Load the board in the worker thread, its progress logged."""
+        self._shown = time.perf_counter()
+        self._logger(f"Window shown in {(self._shown - self._start):.2f}s")
+        self._worker.submit(Board, self._logger, on_result=self._board_loaded)
+
+    def _board_loaded(self, board: Board):
+        """Enable the buttons once the board is loaded."""
+        self._board = board
+        for widget in self._board_widgets:
+            widget.setEnabled(True)
+        now = time.perf_counter()
+        self._logger(f"Board ready in {(now - self._shown):.2f}s, startup {(now - self._start):.2f}s")
+
     def paintEvent(self, event):
         """Overridden function called automatically when initiating the widget and using repaint()."""
         x, y, w = 247, 100, 60  # coordinates of center and width of the hexagon display
@@ -164,7 +236,7 @@ class MainWidget(QtWidgets.QWidget):
         if self._validate_edges(logs=False):
             for i in range(6):
                 painter.setBrush(
-                    QtGui.QBrush(QColor(COLOR_MAPPING[Tile.Edge(int(getattr(self, '_e' + str(i)).text()))]),
+                    QtGui.QBrush(QColor(COLOR_MAPPING[Tile.Edge(int(self._edge_inputs[i].text()))]),
                                  Qt.SolidPattern)
                 )
                 polygon = QtGui.QPolygon([
@@ -185,8 +257,17 @@ class MainWidget(QtWidgets.QWidget):
 
                 painter.drawPolygon(polygon)
 
+    def closeEvent(self, event):
+        """Overridden function called when closing the window, waits for the operations queued."""
+        self._worker.wait()
+        super().closeEvent(event)
+
     def _logger(self, string: str):
-        """Logs for logging lib and Qt window."""
+        """Logs for logging lib and Qt window, from any thread."""
+        self._log.emit(string)
+
+    def _write_log(self, string: str):
+        """Write a log, in the UI thread."""
         logger.info(string)
         self._cursor.insertText(string + "\n")
         self._textDisplay.moveCursor(QtGui.QTextCursor.End)
@@ -210,7 +291,7 @@ class MainWidget(QtWidgets.QWidget):
         invalid_edges = []
         for i_edge in range(6):
             try:
-                Tile.Edge(int(getattr(self, '_e' + str(i_edge)).text()))
+                Tile.Edge(int(self._edge_inputs[i_edge].text()))
             except ValueError:
                 invalid_edges.append(i_edge)
         if invalid_edges:
@@ -219,46 +300,48 @@ class MainWidget(QtWidgets.QWidget):
             return False
         return True
 
+    def _get_edges(self) -> List[Tile.Edge]:
+        """Retrieve the edges entered, already validated."""
+        return [Tile.Edge(int(edge.text())) for edge in self._edge_inputs]
+
     def _help_me(self):
         """The core of the added value."""
         self._reset_preview()
         if not self._validate_edges():
             return
         self.repaint()
+        self._worker.submit(self._search, self._get_edges(), on_result=self._show_help, depends_on=EDGES_INPUT)
 
-        matches, five_of_six_matches = self._board.help_me(
-            [Tile.Edge(int(edge.text())) for edge in [self._e0, self._e1, self._e2, self._e3, self._e4, self._e5]]
-        )
-        if not matches:
+    def _search(self, edges: List[Tile.Edge]) -> tuple:
+        """Rank the placements of a tile and search whether it was seen before, in the worker thread."""
+        return self._board.rank_help(edges, TABLE_SIZE), self._board.find_tile(edges)
+
+    def _show_help(self, result: tuple):
+        """Display the placements found."""
+        (ranking, five_of_six_matches), tile_occ = result
+        if not ranking:
             self._logger("Bruh")
             return
 
-        # Displaying best values for each matches
+        # Displaying best values for each matches, sorted by value, then groups closed and merged, closure
+        # (descending), then distance
         result_table, neighbors_num = [], []
-        matches.sort(key=lambda t: (-t.value, t.distance))  # sort by value (descending) then distance
-        for n_m in range(7, 1, -1):
-            sub_list = [tmp_tile for tmp_tile in matches if tmp_tile.n_neighbors == n_m]
-            if not sub_list:
-                continue
+        for n_m, sub_list in ranking.get_by_neighbors().items():
             neighbors_num.append(n_m)
-            if len(sub_list) > 15:
-                result_table.append(
-                    [
-                        f"V:{temp_tile.value} E:{temp_tile.distance} {temp_tile.tile.get_pos()}"
-                        for temp_tile in sub_list[:15]
-                    ]
-                )
-            else:
-                result_table.append(
-                    [f"V:{temp_tile.value} E:{temp_tile.distance} {temp_tile.tile.get_pos()}" for temp_tile in sub_list]
-                )
+            result_table.append(
+                [
+                    f"V:{temp_tile.value} C:{temp_tile.closure:.0%} E:{temp_tile.distance} "
+                    f"{temp_tile.tile.get_pos()}"
+                    for temp_tile in sub_list
+                ]
+            )
 
         # Create empty slots for a proper table
         results_length = max(len(l_match) for l_match in result_table)
         for line in result_table:
             line += [''] * (results_length - len(line))
 
-        self._logger("#" * (30 * len(result_table) + 1))
+        self._logger("#" * (36 * len(result_table) + 1))
 
         # Transpose the table
         result_table = [
@@ -272,104 +355,179 @@ class MainWidget(QtWidgets.QWidget):
                     display += "\t|"
                 else:
                     display += "  " + match + "\t|"
-            self._logger(repr(display.expandtabs(30))[1:-1])
+            self._logger(repr(display.expandtabs(36))[1:-1])
 
         values = "-"
         for n in neighbors_num:
-            values += " - - - - - - -" + str(n) + "- - - - - - - -"
+            values += " - - - - - - - -" + str(n) + "- - - - - - - - - -"
         self._logger(values)
 
         # 5/6 matches
         for match in five_of_six_matches:
-            self._logger(f"5/6 Match: {match.tile.get_pos()} | Ideal occurrence: {match.ideal_occurrence}")
+            self._logger(
+                f"5/6 Match: {match.tile.get_pos()} | Ideal occurrence: {match.ideal_occurrence}"
+                f" | Closure: {match.closure:.1%}"
+            )
 
         # Retrieving candidate with best value
-        if len(matches) == 1 or matches[0].value != matches[1].value:
-            self._logger(f"BV: M:{matches[0].n_neighbors} V:{matches[0].value} {matches[0].tile.get_pos()}")
-        self._best_value = matches[0].tile  # always have a BV, but no logs if draw
+        best = ranking.best_value
+        if not ranking.best_value_tied:
+            self._logger(f"BV: M:{best.n_neighbors} V:{best.value} {best.tile.get_pos()}{self._groups_summary(best)}")
+        self._best_value = best.tile  # always have a BV, but no logs if draw
 
         # Retrieving candidate with best match
-        matches.sort(key=lambda t: (-t.n_neighbors))
-        if len(matches) == 1 or matches[0].value != matches[1].value:
-            self._logger(f"BM: M:{matches[0].n_neighbors} V:{matches[0].value} {matches[0].tile.get_pos()}")
-        self._best_match = matches[0].tile  # always have a BM, but no logs if draw
+        best = ranking.best_match
+        if not ranking.best_match_tied:
+            self._logger(f"BM: M:{best.n_neighbors} V:{best.value} {best.tile.get_pos()}{self._groups_summary(best)}")
+        self._best_match = best.tile  # always have a BM, but no logs if draw
 
         # Check if tile was seen before
-        tile_occ = self._board.find_tile(
-            [Tile.Edge(int(edge.text())) for edge in [self._e0, self._e1, self._e2, self._e3, self._e4, self._e5]]
-        )
         if not tile_occ:
             self._logger("New tile")
 
+    def _get_queue(self) -> Optional[List[List[Tile.Edge]]]:
+        """Retrieve the tiles of the queue, None if it is empty or one is not valid."""
+        text = self._queue.text().strip()
+        if not text:
+            self._logger("Queue empty: type the next tiles, like 112233 445566")
+            return None
+        tiles = []
+        for i, text in enumerate(re.split(r"[\s,;]+", text)):
+            try:
+                if len(text) != 6:
+                    raise ValueError
+                tiles.append([Tile.Edge(int(edge)) for edge in text])
+            except ValueError:
+                self._logger(f"Tile {i + 1} of the queue not valid: 6 edges expected, like 112233")
+                return None
+        return tiles
+
+    def _help_queue(self):
+        """Help Me for each tile of the queue, searched together."""
+        self._reset_preview()
+        tiles = self._get_queue()
+        if tiles:
+            self._worker.submit(self._search_queue, tiles, on_result=self._show_queue, depends_on=QUEUE_INPUT)
+
+    def _search_queue(self, tiles: List[List[Tile.Edge]]) -> list:
+        """Rank the placements of each tile of the queue and search whether it was seen before, in the worker
+        thread."""
+        results = self._board.help_batch(tiles, TABLE_SIZE)
+        return [(edges, (result, self._board.find_tile(edges))) for edges, result in zip(tiles, results)]
+
+    def _show_queue(self, results: list):
+        """Display the placements found for each tile of the queue, the best ones of the first tile kept to be
+        placed."""
+        for i, (edges, result) in enumerate(results):
+            self._logger(f"Tile {i + 1}/{len(results)}: {''.join(str(int(edge)) for edge in edges)}")
+            self._show_help(result)
+        (ranking, _), _ = results[0][1]
+        self._best_value = ranking.best_value.tile if ranking else None
+        self._best_match = ranking.best_match.tile if ranking else None
+
+    @staticmethod
+    def _groups_summary(match) -> str:
+        """Connected features joined and closed by a match."""
+        summary = f" | group of {match.group} tiles"
+        if match.merges:
+            summary += f", {match.merges} merged"
+        if match.closures:
+            summary += f", {match.closures} closed"
+        return summary
+
     def _place_tile(self):
         if self._validate_coord() and self._validate_edges():
-            self._board.place_tile(Tile(int(self._x.text()), int(self._y.text()), [
-                Tile.Edge(int(edge.text())) for edge in [self._e0, self._e1, self._e2, self._e3, self._e4, self._e5]
-            ]))
+            self._worker.submit(
+                self._board.place_tile, Tile(int(self._x.text()), int(self._y.text()), self._get_edges())
+            )
             self._reset_preview()
 
     def _place_best_match(self):
         if self._best_match:
-            self._board.place_tile(self._best_match)
-            self._logger("Best Match placed")
+            self._worker.submit(
+                self._board.place_tile, self._best_match, on_result=lambda _: self._logger("Best Match placed")
+            )
             self._reset_preview()
         else:
             self._logger("No best tile retrieved")
 
     def _place_best_value(self):
         if self._best_value:
-            self._board.place_tile(self._best_value)
-            self._logger("Best Value placed")
+            self._worker.submit(
+                self._board.place_tile, self._best_value, on_result=lambda _: self._logger("Best Value placed")
+            )
             self._reset_preview()
         else:
             self._logger("No best tile retrieved")
 
     def _find_candidate(self):
         if self._validate_edges():
-            matches = self._board.find_candidate(
-                [Tile.Edge(int(edge.text())) for edge in [self._e0, self._e1, self._e2, self._e3, self._e4, self._e5]])
-            if not matches:
-                self._logger("Candidate not found in database.")
-            elif len(matches) < 11:
-                self._logger(f"Candidate found: {matches}.")
-            else:
-                self._logger(f"Candidate found: {len(matches)} matches.")
-            self.update()
+            self._worker.submit(
+                self._board.find_candidate, self._get_edges(), on_result=self._show_candidate, depends_on=EDGES_INPUT
+            )
+
+    def _show_candidate(self, matches: list):
+        if not matches:
+            self._logger("Candidate not found in database.")
+        elif len(matches) < 11:
+            self._logger(f"Candidate found: {matches}.")
+        else:
+            self._logger(f"Candidate found: {len(matches)} matches.")
+        self.update()
 
     def _find_tile(self):
         if self._validate_edges():
-            matches = self._board.find_tile(
-                [Tile.Edge(int(edge.text())) for edge in [self._e0, self._e1, self._e2, self._e3, self._e4, self._e5]])
-            if not matches:
-                self._logger("Tile not found in database.")
-            elif len(matches) < 11:
-                self._logger(f"Tile found: {matches}.")
-            else:
-                self._logger(f"Tile found: {len(matches)} matches.")
-            self.update()
+            self._worker.submit(
+                self._board.find_tile, self._get_edges(), on_result=self._show_tile, depends_on=EDGES_INPUT
+            )
+
+    def _show_tile(self, matches: list):
+        if not matches:
+            self._logger("Tile not found in database.")
+        elif len(matches) < 11:
+            self._logger(f"Tile found: {matches}.")
+        else:
+            self._logger(f"Tile found: {len(matches)} matches.")
+        self.update()
 
     def _rotate_left(self):
         if self._validate_edges():
             self._rotations += 1
-            (self._e0, self._e1, self._e2, self._e3, self._e4, self._e5) = (
-                self._e1, self._e2, self._e3, self._e4, self._e5, self._e0)
+            self._edge_inputs = self._edge_inputs[1:] + self._edge_inputs[:1]
+            self._worker.cancel_stale(EDGES_INPUT)
             self.update()
 
     def _rotate_right(self):
         if self._validate_edges():
             self._rotations -= 1
-            (self._e0, self._e1, self._e2, self._e3, self._e4, self._e5) = (
-                self._e5, self._e0, self._e1, self._e2, self._e3, self._e4)
+            self._edge_inputs = self._edge_inputs[5:] + self._edge_inputs[:5]
+            self._worker.cancel_stale(EDGES_INPUT)
             self.update()
 
     def _reset_preview(self):
         if self._rotations != 0:
-            self._e0, self._e1, self._e2, self._e3, self._e4, self._e5 = [
-                getattr(self, '_e' + str((i - self._rotations) % 6)) for i in range(6)
-            ]
+            self._edge_inputs = [self._edge_inputs[(i - self._rotations) % 6] for i in range(6)]
             self._rotations = 0
+            self._worker.cancel_stale(EDGES_INPUT)
         self._best_match = None
         self._best_value = None
 
     def _render_fast(self):
-        self._board.render(fast_mode=True)
+        self._worker.submit(self._board.render, True)
+
+    def _profile(self, enabled: bool):
+        """Start profiling the board, or stop and report."""
+        if enabled:
+            self._worker.submit(self._board.set_profiling, True)
+            self._logger("Profiling...")
+        else:
+            self._worker.submit(self._board.set_profiling, False)
+            self._worker.submit(self._board.report_profile)
+
+    def _set_busy(self, busy: bool):
+        """Show the busy indicator while the worker runs."""
+        self._busy_bar.setVisible(busy)
+        if busy:
+            self.setCursor(Qt.BusyCursor)
+        else:
+            self.unsetCursor()
@@ -0,0 +1,113 @@
+"""Background execution of the board operations."""
+from typing import Callable, Optional, Set
+
+from PyQt5 import QtCore
+
+
+class _Signals(QtCore.QObject):
+    """Signals of a job, emitted from the worker thread and received in the UI thread."""
+    finished = QtCore.pyqtSignal(object, object)  # job, result
+    failed = QtCore.pyqtSignal(object, str)  # job, error message
+
+
+class Job(QtCore.QRunnable):
+    """Call to run in the background, its result handed back to the UI thread."""
+
+    def __init__(self, function: Callable, args: tuple, on_result: Optional[Callable], depends_on: Optional[str]):
+        """
+        :param function: function to call.
+        :param args: arguments of the call.
+        :param on_result: called in the UI thread with the result, unless the job got cancelled.
+        :param depends_on: input the job was submitted for, the job being cancelled when it changes. None if not
+            cancellable.
+        """
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = _Signals()
+        self.depends_on = depends_on
+        self.cancelled = False
+        self._function = function
+        self._args = args
+        self._on_result = on_result
+
+    def run(self):
+        """Overridden function called in the worker thread."""
+        if self.cancelled:
+            self.signals.finished.emit(self, None)
+            return
+        try:
+            result = self._function(*self._args)
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+        else:
+            self.signals.finished.emit(self, result)
+
+    def deliver(self, result) -> None:
+        """Hand the result over, in the UI thread."""
+        if not self.cancelled and self._on_result:
+            self._on_result(result)
+
+
+class Worker(QtCore.QObject):
+    """Runs the board operations one at a time in a background thread, in the order they are submitted.
+
+    A single thread keeps the board consistent: a search never runs while a tile is placed.
+    """
+    busy = QtCore.pyqtSignal(bool)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._jobs: Set[Job] = set()
+
+    def submit(self, function: Callable, *args, on_result: Optional[Callable] = None,
+               depends_on: Optional[str] = None) -> Job:
+        """Queue a call.
+
+        :param function: function to call in the worker thread.
+        :param args: arguments of the call.
+        :param on_result: called in the UI thread with the result.
+        :param depends_on: input the call reads, cancelled by cancel_stale() of that input if not delivered yet.
+        :return: job queued.
+        """
+        job = Job(function, args, on_result, depends_on)
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        self._jobs.add(job)
+        if len(self._jobs) == 1:
+            self.busy.emit(True)
+        self._pool.start(job)
+        return job
+
+    def cancel_stale(self, changed: str) -> None:
+        """Cancel the jobs depending on an input that changed. Queued ones are dropped, running ones are ignored.
+
+        :param changed: input changed.
+        """
+        for job in [job for job in self._jobs if job.depends_on == changed and not job.cancelled]:
+            job.cancelled = True
+            if self._pool.tryTake(job):
+                self._done(job)
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Block until all the jobs ran.
+
+        :param msecs: timeout, -1 for none.
+        :return: False if timed out.
+        """
+        return self._pool.waitForDone(msecs)
+
+    def _on_finished(self, job: Job, result) -> None:
+        self._done(job)
+        job.deliver(result)
+
+    def _on_failed(self, job: Job, message: str) -> None:
+        self._done(job)
+        self.failed.emit(message)
+
+    def _done(self, job: Job) -> None:
+        self._jobs.discard(job)
+        if not self._jobs:
+            self.busy.emit(False)